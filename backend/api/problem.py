@@ -4,12 +4,13 @@ from __future__ import annotations
 
 from typing import Any
 
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from api.responses import ORJSONResponse
+
 
 class ProblemDetails(BaseModel):
-    """RFC 9457 problem details payload."""
+    """RFC 9457 problem details payload (OpenAPI schema source only)."""
 
     type: str
     title: str
@@ -21,6 +22,13 @@ class ProblemDetails(BaseModel):
 
 
 PROBLEM_JSON = "application/problem+json"
+_PROBLEM_KEYS = ("type", "title", "status", "detail", "instance", "request_id", "trace_id")
+
+
+class ORJSONProblemResponse(ORJSONResponse):
+    """Problem Details response serialized with orjson."""
+
+    media_type = PROBLEM_JSON
 
 
 def problem_document(
@@ -34,15 +42,11 @@ def problem_document(
     trace_id: str | None = None,
     extras: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
-    payload = ProblemDetails(
-        type=type_,
-        title=title,
-        status=status,
-        detail=detail,
-        instance=instance,
-        request_id=request_id,
-        trace_id=trace_id,
-    ).model_dump(exclude_none=True)
+    payload: dict[str, Any] = {}
+    values = (type_, title, status, detail, instance, request_id, trace_id)
+    for key, value in zip(_PROBLEM_KEYS, values, strict=True):
+        if value is not None:
+            payload[key] = value
 
     if extras:
         payload.update(extras)
@@ -60,7 +64,7 @@ def problem_response(
     request_id: str | None = None,
     trace_id: str | None = None,
     extras: dict[str, Any] | None = None,
-) -> JSONResponse:
+) -> ORJSONProblemResponse:
     payload = problem_document(
         status=status,
         title=title,
@@ -71,4 +75,4 @@ def problem_response(
         trace_id=trace_id,
         extras=extras,
     )
-    return JSONResponse(status_code=status, content=payload, media_type=PROBLEM_JSON)
+    return ORJSONProblemResponse(content=payload, status_code=status)
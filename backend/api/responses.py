@@ -0,0 +1,19 @@
+"""Response classes shared by API routes."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson.
+
+    For handlers that assemble plain dicts themselves; routes returning declared
+    response models are already serialized by pydantic-core.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
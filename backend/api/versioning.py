@@ -0,0 +1,45 @@
+"""Versioned routing helpers."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+API_VERSION_PREFIX = "/v1"
+
+# Scope key holding the path as the client sent it, set when a legacy path is rewritten.
+CLIENT_PATH_SCOPE_KEY = "client_path"
+
+
+def client_path(scope: Scope) -> str:
+    """Return the request path the client sent, before any legacy rewrite."""
+    return scope.get(CLIENT_PATH_SCOPE_KEY) or scope["path"]
+
+
+class LegacyPathMiddleware:
+    """Serve legacy unversioned paths from the ``/v1`` route table.
+
+    Routers are mounted once under ``/v1``; requests whose first path segment
+    matches a known router prefix are rewritten before routing instead of
+    registering every route a second time.
+    """
+
+    def __init__(self, app: ASGIApp, *, prefixes: Iterable[str]) -> None:
+        self.app = app
+        self.prefixes = frozenset(prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            path: str = scope["path"]
+            slash = path.find("/", 1)
+            head = path if slash == -1 else path[:slash]
+            if head in self.prefixes:
+                scope = dict(scope)
+                scope[CLIENT_PATH_SCOPE_KEY] = path
+                scope["path"] = API_VERSION_PREFIX + path
+                scope["raw_path"] = API_VERSION_PREFIX.encode() + (
+                    scope.get("raw_path") or path.encode()
+                )
+
+        await self.app(scope, receive, send)
@@ -4,16 +4,70 @@ from __future__ import annotations
 
 import asyncio
 import random
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Annotated
 
 import httpx
+from fastapi import Depends, Request
+
+from config import get_settings
 
 DEFAULT_TIMEOUT = httpx.Timeout(5.0, connect=1.0, read=4.0, write=4.0, pool=1.0)
-DEFAULT_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
 RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
 
 
-def new_async_client(*, timeout: httpx.Timeout | None = None) -> httpx.AsyncClient:
-    return httpx.AsyncClient(timeout=timeout or DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+def new_async_client(
+    *,
+    timeout: httpx.Timeout | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    """Build a client for outbound calls.
+
+    One client is shared by calls made with different user-supplied credentials, so
+    its cookie jar rejects every cookie: an upstream session (e.g. Jira's JSESSIONID)
+    must never be replayed on a later call made for someone else.
+    """
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        timeout=timeout or DEFAULT_TIMEOUT,
+        limits=limits,
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        transport=transport,
+    )
+
+
+async def get_http_client(request: Request) -> AsyncIterator[httpx.AsyncClient]:
+    """Dependency yielding the app-scoped client created in the lifespan.
+
+    Falls back to a request-scoped client when the lifespan has not run (e.g. a
+    TestClient used without its context manager).
+    """
+    client = getattr(request.app.state, "http_client", None)
+    if client is not None:
+        yield client
+        return
+    async with new_async_client() as fallback:
+        yield fallback
+
+
+HttpClient = Annotated[httpx.AsyncClient, Depends(get_http_client)]
+
+
+@asynccontextmanager
+async def borrow_client(client: httpx.AsyncClient | None) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield an injected client as-is, or a short-lived one owned by the block."""
+    if client is not None:
+        yield client
+        return
+    async with new_async_client() as owned:
+        yield owned
 
 
 async def request_with_retries(
@@ -27,10 +81,11 @@ async def request_with_retries(
     retry_statuses: set[int] | None = None,
     **kwargs,
 ) -> httpx.Response:
-    """Send request with exponential backoff and jitter for transient failures."""
+    """Send request with decorrelated-jitter backoff for transient failures."""
 
     retry_codes = retry_statuses or RETRYABLE_STATUS_CODES
 
+    delay = base_delay_seconds
     attempt = 1
     while True:
         try:
@@ -41,7 +96,11 @@ async def request_with_retries(
             if attempt >= max_attempts:
                 raise
 
-        delay = min(max_delay_seconds, base_delay_seconds * (2 ** (attempt - 1)))
-        jitter = random.uniform(0.0, delay / 2)
-        await asyncio.sleep(delay + jitter)
+        # Decorrelated jitter: uniform in [base, 3 * previous delay], capped.
+        upper = delay * 3
+        delay = min(
+            max_delay_seconds,
+            base_delay_seconds + random.random() * (upper - base_delay_seconds),
+        )
+        await asyncio.sleep(delay)
         attempt += 1
@@ -1,21 +1,34 @@
 """Application configuration."""
 
+from functools import lru_cache
 from pathlib import Path
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 DEFAULT_WEBHOOK_SECRET = "dev-webhook-secret"
 
 
+def _workbench_home() -> Path:
+    return Path.home() / ".incident-workbench"
+
+
 class Settings(BaseSettings):
     """Application settings."""
 
     app_env: str = "development"
-    db_path: Path = Path.home() / ".incident-workbench" / "incidents.db"
-    slack_export_dir: Path = Path.home() / ".incident-workbench" / "imports"
+    db_path: Path = Field(default_factory=lambda: _workbench_home() / "incidents.db")
+    db_read_pool_size: int = 8
+    ingest_write_max_rows: int = 10_000
+    # Concurrent scrypt derivations; each holds about 128 MiB while it runs.
+    password_hash_concurrency: int = 4
+    slack_export_dir: Path = Field(default_factory=lambda: _workbench_home() / "imports")
     ollama_url: str = "http://127.0.0.1:11434"
     webhook_secret: str = DEFAULT_WEBHOOK_SECRET
     webhook_max_attempts: int = 5
+    http_max_connections: int = 200
+    http_max_keepalive_connections: int = 100
+    http_keepalive_expiry: float = 30.0
     auth_enabled: bool = True
     bootstrap_admin_username: str = ""
     bootstrap_admin_password: str = ""
@@ -25,9 +38,13 @@ class Settings(BaseSettings):
         "case_sensitive": False,
     }
 
+    @property
+    def is_production(self) -> bool:
+        return self.app_env.lower() in {"prod", "production"}
+
     def validate_security(self) -> None:
         """Enforce production-safe defaults for secrets and bootstrap credentials."""
-        if self.app_env.lower() not in {"prod", "production"}:
+        if not self.is_production:
             return
 
         if self.webhook_secret.strip() in {"", DEFAULT_WEBHOOK_SECRET}:
@@ -43,4 +60,10 @@ class Settings(BaseSettings):
             )
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, built on first use.
+
+    Tests can call ``get_settings.cache_clear()`` after changing the environment.
+    """
+    return Settings()
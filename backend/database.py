@@ -1,81 +1,237 @@
 """Database connection and migration management."""
 
+import queue
 import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from threading import Lock
 
-from config import settings
+from config import get_settings
+
+# Per-connection tuning applied on every open. WAL makes synchronous=NORMAL
+# durable across application crashes while skipping the fsync on each commit.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _is_blank_sql(text: str) -> bool:
+    """True when ``text`` holds only whitespace and comments."""
+    i = 0
+    while i < len(text):
+        if text[i].isspace():
+            i += 1
+        elif text.startswith("--", i):
+            end = text.find("\n", i)
+            i = len(text) if end == -1 else end + 1
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end == -1 else end + 2
+        else:
+            return False
+    return True
+
+
+def _split_sql_statements(script: str) -> list[str]:
+    """Split a SQL script into complete statements.
+
+    Splits on ``;`` but relies on ``sqlite3.complete_statement`` to keep string
+    literals and trigger bodies intact. Comment-only tails are dropped; a final
+    statement without its semicolon is kept, and an incomplete one raises
+    ``ValueError`` rather than being skipped.
+    """
+    statements: list[str] = []
+    buffer = ""
+    *chunks, remainder = script.split(";")
+    for chunk in chunks:
+        buffer += chunk + ";"
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+
+    tail = buffer + remainder
+    if not _is_blank_sql(tail):
+        if not sqlite3.complete_statement(tail + "\n;"):
+            raise ValueError(f"Incomplete SQL statement at end of script: {tail.strip()[:80]!r}")
+        statements.append(tail.strip())
+    return statements
 
 
 class Database:
-    """SQLite database manager with migration support."""
+    """SQLite database manager with migration support.
 
-    def __init__(self, db_path: Path | None = None) -> None:
+    Request handlers borrow long-lived connections instead of opening one per call:
+    a single writer guarded by a lock (WAL allows only one writer at a time) and a
+    bounded pool of read-only connections. Both pools are filled lazily.
+    """
+
+    def __init__(self, db_path: Path | None = None, *, read_pool_size: int | None = None) -> None:
+        settings = get_settings()
         self.db_path = db_path or settings.db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         # Lock to protect connection creation (note: individual connections still need
         # their own synchronization, but this is better than no protection)
         self._lock = Lock()
+        # journal_mode=WAL is persisted in the database file, so it only has to be
+        # switched on by the first connection this manager opens.
+        self._wal_enabled = False
+
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = Lock()
+        self._read_pool_size = read_pool_size or settings.db_read_pool_size
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._readers_opened = 0
 
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection with WAL mode enabled.
+        """Get a dedicated database connection with WAL mode enabled.
 
         Note: Returns a connection with check_same_thread=False. Each connection
         should be used within a single request/context and properly closed.
-        WAL mode allows concurrent reads with single writer.
+        Prefer get_reader()/get_writer() for short request-scoped work; a dedicated
+        connection is only needed when the caller awaits while holding it.
         """
         with self._lock:
-            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn = sqlite3.connect(
+                str(self.db_path), check_same_thread=False, cached_statements=256
+            )
             conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA foreign_keys=ON")
+            if not self._wal_enabled:
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._wal_enabled = True
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
         return conn
 
+    @contextmanager
+    def get_writer(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the shared writer connection.
+
+        Commits when the block exits cleanly and rolls back on error. The lock is
+        held for the whole block, so never await while holding the writer.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self.get_connection()
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def get_reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool, blocking if all are in use."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._readers_opened < self._read_pool_size
+            if can_open:
+                self._readers_opened += 1
+
+        if not can_open:
+            return self._readers.get()
+
+        try:
+            conn = self.get_connection()
+            conn.execute("PRAGMA query_only=1")
+        except Exception:
+            with self._lock:
+                self._readers_opened -= 1
+            raise
+        return conn
+
+    def close(self) -> None:
+        """Close pooled connections (connections currently borrowed are left alone)."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._readers_opened -= 1
+
     def run_migrations(self) -> None:
         """Run all pending migrations."""
-        conn = self.get_connection()
         try:
-            # Create migrations table if it doesn't exist
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS _migrations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.commit()
-
-            # Get already applied migrations
-            cursor = conn.execute("SELECT name FROM _migrations")
-            applied = {row["name"] for row in cursor.fetchall()}
-
-            # Find and apply pending migrations
-            migrations_dir = Path(__file__).parent / "migrations"
-            if not migrations_dir.exists():
-                return
-
-            migration_files = sorted(migrations_dir.glob("*.sql"))
-            for migration_file in migration_files:
-                migration_name = migration_file.name
-                if migration_name in applied:
-                    continue
-
-                print(f"Applying migration: {migration_name}")
-                sql = migration_file.read_text()
-
-                # Execute migration SQL
-                conn.executescript(sql)
-
-                # Record migration
-                conn.execute("INSERT INTO _migrations (name) VALUES (?)", (migration_name,))
-                conn.commit()
-                print(f"Migration applied: {migration_name}")
-
+            with self.get_writer() as conn:
+                self._apply_migrations(conn)
         except Exception as e:
-            conn.rollback()
             raise RuntimeError(f"Migration failed: {e}") from e
-        finally:
-            conn.close()
+
+    def _apply_migrations(self, conn: sqlite3.Connection) -> None:
+        # Create migrations table if it doesn't exist
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS _migrations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+        # Get already applied migrations
+        applied = frozenset(row["name"] for row in conn.execute("SELECT name FROM _migrations"))
+
+        # Find pending migrations; steady-state startup has none and stops here
+        migrations_dir = Path(__file__).parent / "migrations"
+        if not migrations_dir.exists():
+            return
+
+        pending = sorted(
+            path
+            for path in migrations_dir.iterdir()
+            if path.suffix == ".sql" and path.name not in applied
+        )
+        if not pending:
+            return
+
+        # Apply all pending migrations in one transaction: a single fsync on commit,
+        # and a failing migration leaves no partially applied batch behind.
+        # executescript() would commit around every file, so statements are run
+        # one by one instead.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for migration_file in pending:
+                print(f"Applying migration: {migration_file.name}")
+                for statement in _split_sql_statements(migration_file.read_text()):
+                    conn.execute(statement)
+            conn.executemany(
+                "INSERT INTO _migrations (name) VALUES (?)",
+                [(migration_file.name,) for migration_file in pending],
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+        for migration_file in pending:
+            print(f"Migration applied: {migration_file.name}")
 
 
 db = Database()
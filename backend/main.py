@@ -6,23 +6,39 @@ import logging
 from collections import deque
 from contextlib import asynccontextmanager
 
+import orjson
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import Response
 
-from api.problem import problem_response
-from config import settings as app_settings
+from api.problem import ORJSONProblemResponse, problem_response
+from api.versioning import API_VERSION_PREFIX, LegacyPathMiddleware, client_path
+from clients.http import new_async_client
+from config import get_settings
 from database import db
-from exceptions import WorkbenchError
+from exceptions import (
+    InsufficientDataError,
+    JiraConnectionError,
+    JiraQueryError,
+    OllamaModelNotFoundError,
+    OllamaUnavailableError,
+    ReportGenerationError,
+    SlackAPIError,
+    WorkbenchError,
+)
 from observability.bootstrap import setup_observability
 from observability.logging import configure_structured_logging
 from observability.middleware import RequestContextMiddleware
 from routers import auth, clusters, health, incidents, ingest, reports, webhooks
 from routers import settings as settings_router
-from security.auth import ensure_bootstrap_admin
+from security.auth import ensure_bootstrap_admin, last_seen_flusher
 from security.csrf import CSRFMiddleware
 from security.idempotency import IdempotencyMiddleware
+from security.settings import CSRF_HEADER_NAME
+from services.incident_store import incident_write_queue
+from services.ollama_client import OllamaClient
 
 logger = logging.getLogger(__name__)
 
@@ -52,21 +68,44 @@ PROBLEM_DETAILS_SCHEMA = {
 }
 
 
-SCHEMA_REF_PREFIX = "#/components/schemas/"
+API_ROUTERS = (
+    auth.router,
+    health.router,
+    settings_router.router,
+    ingest.router,
+    incidents.router,
+    clusters.router,
+    reports.router,
+    webhooks.router,
+)
 
+_HTTP_METHODS = frozenset({"get", "put", "post", "delete", "patch", "options", "head", "trace"})
+_ERROR_STATUS_CLASSES = frozenset({"4", "5"})
 
-def _is_null_type_schema(candidate: object) -> bool:
-    return isinstance(candidate, dict) and candidate.get("type") == "null"
+SCHEMA_REF_PREFIX = "#/components/schemas/"
 
 
-def _normalize_nullable_for_oas30(node: object) -> None:
+def _normalize_nullable_for_oas30(root: object) -> None:
     """Convert JSON Schema null unions into OAS3 nullable form."""
-    if isinstance(node, dict):
+    stack: list[object] = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+
         any_of = node.get("anyOf")
         if isinstance(any_of, list):
-            non_null = [item for item in any_of if not _is_null_type_schema(item)]
-            null_entries = [item for item in any_of if _is_null_type_schema(item)]
-            if len(non_null) == 1 and len(null_entries) == 1 and isinstance(non_null[0], dict):
+            non_null: list[object] = []
+            has_null = False
+            for item in any_of:
+                if isinstance(item, dict) and item.get("type") == "null":
+                    has_null = True
+                else:
+                    non_null.append(item)
+            if has_null and len(non_null) == 1 and isinstance(non_null[0], dict):
                 preserved = {k: v for k, v in node.items() if k != "anyOf"}
                 selected = dict(non_null[0])
 
@@ -78,24 +117,28 @@ def _normalize_nullable_for_oas30(node: object) -> None:
                 node.update(preserved)
                 node["nullable"] = True
 
-        for value in list(node.values()):
-            _normalize_nullable_for_oas30(value)
-    elif isinstance(node, list):
-        for item in node:
-            _normalize_nullable_for_oas30(item)
-
-
-def _iter_schema_refs(node: object) -> set[str]:
-    refs: set[str] = set()
-    if isinstance(node, dict):
-        for key, value in node.items():
-            if key == "$ref" and isinstance(value, str) and value.startswith(SCHEMA_REF_PREFIX):
-                refs.add(value.removeprefix(SCHEMA_REF_PREFIX))
-            else:
-                refs.update(_iter_schema_refs(value))
-    elif isinstance(node, list):
-        for item in node:
-            refs.update(_iter_schema_refs(item))
+        stack.extend(node.values())
+
+
+def _iter_schema_refs(root: object, refs: set[str] | None = None) -> set[str]:
+    """Collect component schema names referenced anywhere under ``root``.
+
+    Names are added to ``refs`` when given so callers can share one accumulator.
+    """
+    if refs is None:
+        refs = set()
+    stack: list[object] = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "$ref" and isinstance(value, str):
+                    if value.startswith(SCHEMA_REF_PREFIX):
+                        refs.add(value.removeprefix(SCHEMA_REF_PREFIX))
+                else:
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
     return refs
 
 
@@ -111,7 +154,7 @@ def _prune_unused_component_schemas(schema: dict) -> None:
     root_refs: set[str] = set()
     for key, value in schema.items():
         if key != "components":
-            root_refs.update(_iter_schema_refs(value))
+            _iter_schema_refs(value, root_refs)
             continue
 
         if not isinstance(value, dict):
@@ -119,7 +162,7 @@ def _prune_unused_component_schemas(schema: dict) -> None:
         for component_name, component_value in value.items():
             if component_name == "schemas":
                 continue
-            root_refs.update(_iter_schema_refs(component_value))
+            _iter_schema_refs(component_value, root_refs)
 
     reachable: set[str] = set()
     queue: deque[str] = deque(root_refs)
@@ -132,9 +175,7 @@ def _prune_unused_component_schemas(schema: dict) -> None:
         if not isinstance(definition, dict):
             continue
         reachable.add(schema_name)
-        for nested_ref in _iter_schema_refs(definition):
-            if nested_ref not in reachable:
-                queue.append(nested_ref)
+        queue.extend(_iter_schema_refs(definition) - reachable)
 
     for schema_name in list(schemas.keys()):
         if schema_name not in reachable:
@@ -145,16 +186,24 @@ def _prune_unused_component_schemas(schema: dict) -> None:
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     configure_structured_logging()
-    app_settings.validate_security()
+    get_settings().validate_security()
     logger.info("running database migrations")
     db.run_migrations()
     ensure_bootstrap_admin()
     logger.info("database migrations complete")
 
     setup_observability(app)
+    app.state.http_client = new_async_client()
+    app.state.ollama = OllamaClient(http_client=app.state.http_client)
+    incident_write_queue.start()
+    last_seen_flusher.start()
 
     yield
 
+    await last_seen_flusher.stop()
+    await incident_write_queue.stop()
+    await app.state.http_client.aclose()
+    db.close()
     logger.info("backend shutdown complete")
 
 
@@ -176,6 +225,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Innermost so CSRF/idempotency keep seeing the path the client sent.
+app.add_middleware(
+    LegacyPathMiddleware,
+    prefixes=tuple(api_router.prefix for api_router in API_ROUTERS),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -183,8 +237,16 @@ app.add_middleware(
         "tauri://localhost",
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=[
+        "Content-Type",
+        "Authorization",
+        "X-Request-ID",
+        CSRF_HEADER_NAME,
+        "Idempotency-Key",
+        "traceparent",
+        "tracestate",
+    ],
 )
 
 app.add_middleware(CSRFMiddleware)
@@ -222,8 +284,6 @@ def custom_openapi() -> dict:
         if isinstance(schemas, dict):
             schemas.setdefault("ProblemDetails", PROBLEM_DETAILS_SCHEMA)
 
-    http_methods = {"get", "put", "post", "delete", "patch", "options", "head", "trace"}
-
     paths = schema.get("paths", {})
     if isinstance(paths, dict):
         for path_item in paths.values():
@@ -231,7 +291,7 @@ def custom_openapi() -> dict:
                 continue
 
             for method, operation in path_item.items():
-                if method.lower() not in http_methods or not isinstance(operation, dict):
+                if method.lower() not in _HTTP_METHODS or not isinstance(operation, dict):
                     continue
 
                 responses = operation.get("responses", {})
@@ -239,7 +299,7 @@ def custom_openapi() -> dict:
                     continue
 
                 for status_code, response in responses.items():
-                    if not str(status_code).startswith(("4", "5")):
+                    if str(status_code)[:1] not in _ERROR_STATUS_CLASSES:
                         continue
                     if not isinstance(response, dict):
                         continue
@@ -262,28 +322,40 @@ def custom_openapi() -> dict:
 app.openapi = custom_openapi  # type: ignore[method-assign]
 
 
-def _status_for_workbench_error(exc: WorkbenchError) -> int:
-    from exceptions import (
-        InsufficientDataError,
-        JiraConnectionError,
-        JiraQueryError,
-        OllamaModelNotFoundError,
-        OllamaUnavailableError,
-        ReportGenerationError,
-        SlackAPIError,
-    )
+def _serve_precomputed_openapi() -> None:
+    """Build the schema once and serve the encoded bytes from /openapi.json.
+
+    Routes are immutable in production, so requests skip ``get_openapi`` and
+    re-serialization entirely. Development keeps the lazy per-process build.
+    """
+    openapi_url = app.openapi_url
+    if openapi_url is None:
+        return
+    body = orjson.dumps(app.openapi())
+
+    async def openapi_json(_: Request) -> Response:
+        return Response(content=body, media_type="application/json")
+
+    app.router.routes[:] = [
+        route for route in app.router.routes if getattr(route, "path", None) != openapi_url
+    ]
+    app.add_route(openapi_url, openapi_json, include_in_schema=False)
+
+
+_STATUS_MAP: dict[type[BaseException], int] = {
+    OllamaUnavailableError: 503,
+    OllamaModelNotFoundError: 503,
+    JiraConnectionError: 502,
+    SlackAPIError: 502,
+    JiraQueryError: 422,
+    InsufficientDataError: 422,
+    ReportGenerationError: 500,
+}
 
-    if isinstance(exc, (OllamaUnavailableError, OllamaModelNotFoundError)):
-        return 503
-    if isinstance(exc, (JiraConnectionError, SlackAPIError)):
-        return 502
-    if isinstance(exc, JiraQueryError):
-        return 422
-    if isinstance(exc, InsufficientDataError):
-        return 422
-    if isinstance(exc, ReportGenerationError):
-        return 500
-    return 500
+
+def _status_for_workbench_error(exc: WorkbenchError) -> int:
+    # Subclasses resolve through their nearest mapped ancestor.
+    return next((_STATUS_MAP[cls] for cls in type(exc).__mro__ if cls in _STATUS_MAP), 500)
 
 
 def _problem(
@@ -294,15 +366,15 @@ def _problem(
     detail: str | None,
     type_: str,
     extras: dict | None = None,
-):
+) -> ORJSONProblemResponse:
     return problem_response(
         status=status,
         title=title,
         detail=detail,
         type_=type_,
-        instance=str(request.url.path),
-        request_id=getattr(request.state, "request_id", None),
-        trace_id=getattr(request.state, "trace_id", None),
+        instance=client_path(request.scope),
+        request_id=request.scope.get("request_id"),
+        trace_id=request.scope.get("trace_id"),
         extras=extras,
     )
 
@@ -358,23 +430,11 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
     )
 
 
-def _mount_api_router(router) -> None:
-    """Mount versioned routes while preserving legacy unversioned compatibility."""
-    app.include_router(router, prefix="/v1")
-    app.include_router(router, include_in_schema=False)
-
+for api_router in API_ROUTERS:
+    app.include_router(api_router, prefix=API_VERSION_PREFIX)
 
-for api_router in (
-    auth.router,
-    health.router,
-    settings_router.router,
-    ingest.router,
-    incidents.router,
-    clusters.router,
-    reports.router,
-    webhooks.router,
-):
-    _mount_api_router(api_router)
+if get_settings().is_production:
+    _serve_precomputed_openapi()
 
 
 if __name__ == "__main__":
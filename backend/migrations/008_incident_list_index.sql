@@ -0,0 +1,4 @@
+-- Composite index for filtered incident listing.
+-- Serves source/severity filters and the occurred_at DESC ordering without a sort.
+CREATE INDEX IF NOT EXISTS idx_incidents_src_sev_occurred
+    ON incidents(source, severity, occurred_at DESC);
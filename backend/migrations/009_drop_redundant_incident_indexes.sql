@@ -0,0 +1,6 @@
+-- Drop single-column incident indexes that duplicate a leading prefix of another index.
+-- external_id lookups use the UNIQUE(external_id, source) autoindex, which also backs
+-- the ingest UPSERT; source filters use idx_incidents_src_sev_occurred. Each dropped
+-- index was one more b-tree write per ingested row.
+DROP INDEX IF EXISTS idx_incidents_external_id;
+DROP INDEX IF EXISTS idx_incidents_source;
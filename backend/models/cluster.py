@@ -1,9 +1,11 @@
 """Clustering result models."""
 
-from datetime import datetime, timezone
+from datetime import datetime
 
 from pydantic import BaseModel, Field
 
+from observability.context import request_now
+
 
 class ClusterResult(BaseModel):
     """Single cluster within a run."""
@@ -24,4 +26,4 @@ class ClusterRunResult(BaseModel):
     parameters: dict = Field(default_factory=dict)
     clusters: list[ClusterResult] = Field(default_factory=list)
     noise_incident_ids: list[int] = Field(default_factory=list)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=request_now)
@@ -1,12 +1,14 @@
 """Incident domain models."""
 
-from datetime import datetime, timezone
-from enum import Enum
+from datetime import datetime
+from enum import StrEnum
 
 from pydantic import BaseModel, Field
 
+from observability.context import request_now
 
-class Severity(str, Enum):
+
+class Severity(StrEnum):
     """Incident severity levels."""
 
     SEV1 = "SEV1"
@@ -16,7 +18,7 @@ class Severity(str, Enum):
     UNKNOWN = "UNKNOWN"
 
 
-class IncidentSource(str, Enum):
+class IncidentSource(StrEnum):
     """Source of incident data."""
 
     JIRA = "jira"
@@ -36,4 +38,4 @@ class Incident(BaseModel):
     occurred_at: datetime
     resolved_at: datetime | None = None
     raw_data: dict = Field(default_factory=dict)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=request_now)
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 from contextvars import ContextVar
+from datetime import UTC, datetime
 
 _request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
 _trace_id: ContextVar[str | None] = ContextVar("trace_id", default=None)
+_request_now: ContextVar[datetime | None] = ContextVar("request_now", default=None)
 
 
 def set_request_id(request_id: str | None) -> None:
@@ -22,3 +24,20 @@ def set_trace_id(trace_id: str | None) -> None:
 
 def get_trace_id() -> str | None:
     return _trace_id.get()
+
+
+def set_request_now(now: datetime | None) -> None:
+    _request_now.set(now)
+
+
+def get_request_now() -> datetime | None:
+    return _request_now.get()
+
+
+def request_now() -> datetime:
+    """Return the current request's start time, or the wall clock outside a request.
+
+    Used as a model ``default_factory`` so every row built while handling one
+    request shares a single timestamp instead of allocating its own.
+    """
+    return _request_now.get() or datetime.now(UTC)
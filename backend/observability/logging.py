@@ -2,28 +2,38 @@
 
 from __future__ import annotations
 
-import json
 import logging
 from datetime import UTC, datetime
 
+import orjson
+
 from observability.context import get_request_id, get_trace_id
 
 
+class CorrelationFilter(logging.Filter):
+    """Stamp request/trace IDs onto each record while still in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = get_request_id()
+        record.trace_id = get_trace_id()
+        return True
+
+
 class JsonLogFormatter(logging.Formatter):
     """Emit JSON log lines for easier backend observability."""
 
     def format(self, record: logging.LogRecord) -> str:
         payload = {
-            "ts": datetime.now(UTC).isoformat(),
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
-            "request_id": get_request_id(),
-            "trace_id": get_trace_id(),
+            "request_id": getattr(record, "request_id", None),
+            "trace_id": getattr(record, "trace_id", None),
         }
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload, default=str)
+        return orjson.dumps(payload, default=str).decode()
 
 
 def configure_structured_logging(level: int = logging.INFO) -> None:
@@ -40,5 +50,6 @@ def configure_structured_logging(level: int = logging.INFO) -> None:
         return
 
     handler = logging.StreamHandler()
+    handler.addFilter(CorrelationFilter())
     handler.setFormatter(JsonLogFormatter())
     root.handlers = [handler]
@@ -2,39 +2,61 @@
 
 from __future__ import annotations
 
+import re
+from datetime import UTC, datetime
 from uuid import uuid4
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from observability.context import set_request_id, set_trace_id
+from observability.context import set_request_id, set_request_now, set_trace_id
 
+# W3C trace context: version-traceid-parentid-flags; later versions may append fields.
+_TRACEPARENT_RE = re.compile(r"[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}(?:-|$)")
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
-    """Attach request/trace correlation identifiers to request context."""
 
-    async def dispatch(self, request: Request, call_next):
-        request_id = request.headers.get("X-Request-ID") or str(uuid4())
-        traceparent = request.headers.get("traceparent")
-        tracestate = request.headers.get("tracestate")
+class RequestContextMiddleware:
+    """Attach request/trace correlation identifiers to request context.
 
-        trace_id = None
-        if traceparent:
-            parts = traceparent.split("-")
-            if len(parts) >= 4:
-                trace_id = parts[1]
+    Plain ASGI rather than ``BaseHTTPMiddleware``: it only reads request headers and
+    adds response headers, so it does not need a task group or a wrapped body.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        set_request_now(datetime.now(UTC))
+        headers = Headers(scope=scope)
+        request_id = headers.get("x-request-id") or uuid4().hex
+        traceparent = headers.get("traceparent")
+        tracestate = headers.get("tracestate")
+
+        match = _TRACEPARENT_RE.match(traceparent) if traceparent else None
+        trace_id = match.group(1) if match else None
 
         set_request_id(request_id)
         set_trace_id(trace_id)
 
-        request.state.request_id = request_id
-        request.state.trace_id = trace_id
-
-        response: Response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        if traceparent:
-            response.headers["traceparent"] = traceparent
-        if tracestate:
-            response.headers["tracestate"] = tracestate
-        return response
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["trace_id"] = trace_id
+        # Plain scope keys let error paths read the IDs without going through State.
+        scope["request_id"] = request_id
+        scope["trace_id"] = trace_id
+
+        async def send_with_context(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Request-ID"] = request_id
+                if traceparent:
+                    response_headers["traceparent"] = traceparent
+                if tracestate:
+                    response_headers["tracestate"] = tracestate
+            await send(message)
+
+        await self.app(scope, receive, send_with_context)
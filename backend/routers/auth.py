@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
@@ -23,15 +24,17 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/login")
 async def login(payload: LoginRequest, request: Request, response: Response) -> AuthSessionResponse:
     """Authenticate with username/password and issue session + csrf cookies."""
-    user = authenticate_credentials(payload.username, payload.password)
+    # Password hashing takes hundreds of milliseconds; hashlib releases the GIL while
+    # OpenSSL derives the key, so a worker thread keeps other requests moving.
+    user = await asyncio.to_thread(authenticate_credentials, payload.username, payload.password)
     if user is None:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     csrf_token = create_session(
-        response=response, user_id=user.user_id, request_scheme=request.url.scheme
+        response=response, user_id=user.user_id, request_scheme=request.scope["scheme"]
     )
     return AuthSessionResponse(
-        user=AuthUserResponse(username=user.username, roles=sorted(user.roles)),
+        user=AuthUserResponse.model_construct(username=user.username, roles=sorted(user.roles)),
         csrf_token=csrf_token,
     )
 
@@ -46,11 +49,13 @@ async def logout(
     del current_user
     session_token = session_token_from_request(request)
     revoke_session_by_token(session_token)
-    clear_auth_cookies(response=response, request_scheme=request.url.scheme)
+    clear_auth_cookies(response=response, request_scheme=request.scope["scheme"])
     return {"status": "logged_out"}
 
 
 @router.get("/me")
 async def me(current_user: Annotated[AuthUser, Depends(get_current_user)]) -> AuthUserResponse:
     """Return the authenticated user context."""
-    return AuthUserResponse(username=current_user.username, roles=sorted(current_user.roles))
+    return AuthUserResponse.model_construct(
+        username=current_user.username, roles=sorted(current_user.roles)
+    )
@@ -1,6 +1,8 @@
 """Clustering router."""
 
-from typing import Annotated
+import asyncio
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 
@@ -9,17 +11,44 @@ from exceptions import ClusteringError, InsufficientDataError, OllamaUnavailable
 from models.api import ClusterRequest, ClusterResponse
 from models.cluster import ClusterRunResult
 from security.auth import AuthUser, require_roles_dependency
-from services.clusterer import IncidentClusterer
-from services.embedder import IncidentEmbedder
-from services.ollama_client import OllamaClient
-from services.summarizer import ClusterSummarizer
+from services.ollama_client import Ollama
+
+if TYPE_CHECKING:
+    from services.clusterer import IncidentClusterer
+    from services.embedder import IncidentEmbedder
+    from services.summarizer import ClusterSummarizer
 
 router = APIRouter(prefix="/clusters", tags=["clusters"])
 AdminUser = Annotated[AuthUser, Depends(require_roles_dependency({"admin"}))]
 
 
+# The clustering pipeline pulls in numpy (and scikit-learn on first run); load it
+# on first use so importing the app stays cheap.
+@lru_cache(maxsize=1)
+def _clusterer() -> type["IncidentClusterer"]:
+    from services.clusterer import IncidentClusterer
+
+    return IncidentClusterer
+
+
+@lru_cache(maxsize=1)
+def _embedder() -> type["IncidentEmbedder"]:
+    from services.embedder import IncidentEmbedder
+
+    return IncidentEmbedder
+
+
+@lru_cache(maxsize=1)
+def _summarizer() -> type["ClusterSummarizer"]:
+    from services.summarizer import ClusterSummarizer
+
+    return ClusterSummarizer
+
+
 @router.post("/run")
-async def run_clustering(request: ClusterRequest, current_user: AdminUser) -> ClusterResponse:
+async def run_clustering(
+    request: ClusterRequest, current_user: AdminUser, ollama: Ollama
+) -> ClusterResponse:
     """
     Run clustering algorithm on all incidents.
 
@@ -30,8 +59,8 @@ async def run_clustering(request: ClusterRequest, current_user: AdminUser) -> Cl
     4. Return results
     """
     del current_user
+    # Dedicated connection: the pipeline awaits Ollama while holding it.
     conn = db.get_connection()
-    ollama = OllamaClient()
 
     try:
         # Step 1: Check Ollama availability
@@ -42,11 +71,11 @@ async def run_clustering(request: ClusterRequest, current_user: AdminUser) -> Cl
             )
 
         # Step 2: Embed any new incidents
-        embedder = IncidentEmbedder(conn, ollama)
+        embedder = _embedder()(conn, ollama)
         _ = await embedder.embed_all_incidents()
 
         # Step 3: Run clustering
-        clusterer = IncidentClusterer(conn)
+        clusterer = _clusterer()(conn)
 
         # Use request parameters with defaults
         linkage = "average"  # Always use average for cosine
@@ -69,7 +98,7 @@ async def run_clustering(request: ClusterRequest, current_user: AdminUser) -> Cl
             raise HTTPException(status_code=500, detail=e.message)
 
         # Step 4: Generate cluster names
-        summarizer = ClusterSummarizer(ollama, conn)
+        summarizer = _summarizer()(ollama, conn)
         await summarizer.name_all_clusters(result.run_id)
 
         # Reload result to get updated names
@@ -89,31 +118,29 @@ async def run_clustering(request: ClusterRequest, current_user: AdminUser) -> Cl
         raise HTTPException(status_code=500, detail=f"Clustering failed: {str(e)}")
     finally:
         conn.close()
-        await ollama.close()
+
+
+def _list_runs() -> list[ClusterRunResult]:
+    with db.get_reader() as conn:
+        return _clusterer()(conn).list_runs()
+
+
+def _get_run(run_id: str) -> ClusterRunResult | None:
+    with db.get_reader() as conn:
+        return _clusterer()(conn).get_run(run_id)
 
 
 @router.get("")
 async def list_cluster_runs() -> list[ClusterRunResult]:
     """List all clustering runs."""
-    conn = db.get_connection()
-    try:
-        clusterer = IncidentClusterer(conn)
-        return clusterer.list_runs()
-    finally:
-        conn.close()
+    return await asyncio.to_thread(_list_runs)
 
 
 @router.get("/{run_id}")
 async def get_cluster_run(run_id: str) -> ClusterResponse:
     """Get details of a specific clustering run."""
-    conn = db.get_connection()
-    try:
-        clusterer = IncidentClusterer(conn)
-        result = clusterer.get_run(run_id)
-
-        if not result:
-            raise HTTPException(status_code=404, detail="Cluster run not found")
+    result = await asyncio.to_thread(_get_run, run_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Cluster run not found")
 
-        return ClusterResponse(run=result)
-    finally:
-        conn.close()
+    return ClusterResponse(run=result)
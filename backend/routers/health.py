@@ -1,35 +1,39 @@
 """Health check router."""
 
+import asyncio
+
 from fastapi import APIRouter
 
 from database import db
-from services.ollama_client import OllamaClient
+from services.ollama_client import Ollama, OllamaClient
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 
-@router.get("")
-async def health_check() -> dict:
-    """Health check endpoint."""
-    # Check database connectivity
+def _probe_db() -> str:
     try:
-        conn = db.get_connection()
-        cursor = conn.execute("SELECT 1")
-        cursor.fetchone()
-        conn.close()
-        db_status = "ok"
+        with db.get_reader() as conn:
+            conn.execute("SELECT 1").fetchone()
+        return "ok"
     except Exception as e:
-        db_status = f"error: {str(e)}"
+        return f"error: {str(e)}"
 
-    # Check Ollama availability
-    ollama_client = OllamaClient()
+
+async def _probe_ollama(ollama_client: OllamaClient) -> str:
     try:
         is_available = await ollama_client.is_available()
-        ollama_status = "ok" if is_available else "unavailable"
+        return "ok" if is_available else "unavailable"
     except Exception as e:
-        ollama_status = f"error: {str(e)}"
-    finally:
-        await ollama_client.close()
+        return f"error: {str(e)}"
+
+
+@router.get("")
+async def health_check(ollama: Ollama) -> dict:
+    """Health check endpoint."""
+    # Probe the database (off the event loop) and Ollama concurrently.
+    db_status, ollama_status = await asyncio.gather(
+        asyncio.to_thread(_probe_db), _probe_ollama(ollama)
+    )
 
     return {
         "status": "ok",
@@ -47,10 +51,7 @@ async def liveness() -> dict:
 @router.get("/ready")
 async def readiness() -> dict:
     """Readiness probe that confirms dependencies are reachable."""
-    conn = db.get_connection()
-    try:
+    with db.get_reader() as conn:
         conn.execute("SELECT 1").fetchone()
-    finally:
-        conn.close()
 
     return {"status": "ready"}
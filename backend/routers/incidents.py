@@ -1,11 +1,14 @@
 """Incident management router."""
 
-import json
+import asyncio
+import sqlite3
 from datetime import datetime
 from typing import Annotated
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Path, Query
 
+from api.responses import ORJSONResponse
 from database import db
 from models.api import IncidentListResponse, IncidentResponse
 from models.incident import Incident, IncidentSource, Severity
@@ -34,80 +37,203 @@ AUTH_403_RESPONSE = {
     },
 }
 
+# Stored enum values map straight to members; a dict hit is cheaper than Enum.__call__.
+_SOURCE_BY_VALUE = {member.value: member for member in IncidentSource}
+_SEVERITY_BY_VALUE = {member.value: member for member in Severity}
 
-@router.get("", responses={401: AUTH_401_RESPONSE})
+
+def _row_to_incident(row: sqlite3.Row) -> Incident:
+    """Build an Incident from a stored row without re-running validation.
+
+    Trust boundary: rows were validated as Incident models before ingestion wrote
+    them, and the schema enforces the NOT NULL columns, so only type conversion
+    is needed here.
+    """
+    resolved_at = row["resolved_at"]
+    return Incident.model_construct(
+        id=row["id"],
+        external_id=row["external_id"],
+        source=_SOURCE_BY_VALUE[row["source"]],
+        severity=_SEVERITY_BY_VALUE[row["severity"]],
+        title=row["title"],
+        description=row["description"] or "",
+        occurred_at=datetime.fromisoformat(row["occurred_at"]),
+        resolved_at=datetime.fromisoformat(resolved_at) if resolved_at else None,
+        raw_data=orjson.loads(row["raw_data"]),
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+_INCIDENT_COLUMNS = (
+    "id, external_id, source, severity, title, description, "
+    "occurred_at, resolved_at, raw_data, created_at"
+)
+
+
+def _iso_timestamp(value: str | None) -> str | None:
+    """Render a stored timestamp exactly as pydantic serializes the parsed datetime.
+
+    pydantic emits isoformat() output, except that a zero UTC offset is written as
+    'Z'. Parsing first also turns SQLite CURRENT_TIMESTAMP's space separator into 'T'.
+    """
+    if value is None:
+        return None
+    text = datetime.fromisoformat(value).isoformat()
+    return f"{text[:-6]}Z" if text.endswith("+00:00") else text
+
+
+def _row_to_incident_json(row: sqlite3.Row) -> dict[str, object]:
+    """Shape a row as the JSON of the equivalent Incident, without building the model."""
+    return {
+        "id": row["id"],
+        "external_id": row["external_id"],
+        "source": row["source"],
+        "severity": row["severity"],
+        "title": row["title"],
+        "description": row["description"] or "",
+        "occurred_at": _iso_timestamp(row["occurred_at"]),
+        "resolved_at": _iso_timestamp(row["resolved_at"]),
+        "raw_data": orjson.loads(row["raw_data"]),
+        "created_at": _iso_timestamp(row["created_at"]),
+    }
+
+
+def _build_list_sql(by_source: bool, by_severity: bool) -> tuple[str, str, str]:
+    where = " WHERE 1=1"
+    if by_source:
+        where += " AND source = ?"
+    if by_severity:
+        where += " AND severity = ?"
+    page_tail = f" FROM incidents{where} ORDER BY occurred_at DESC LIMIT ? OFFSET ?"
+    return (
+        f"SELECT {_INCIDENT_COLUMNS}{page_tail}",
+        f"SELECT {_INCIDENT_COLUMNS}, COUNT(*) OVER () AS _total{page_tail}",
+        f"SELECT COUNT(*) FROM incidents{where}",
+    )
+
+
+# (page, counted page, count) SQL per (source filter, severity filter) combination.
+# Reusing the exact same strings lets each connection's statement cache skip
+# re-preparing them.
+_LIST_SQL = {
+    (by_source, by_severity): _build_list_sql(by_source, by_severity)
+    for by_source in (False, True)
+    for by_severity in (False, True)
+}
+
+# Incident-ID query for the metrics endpoint, keyed the same way.
+_METRICS_SQL = {
+    (False, False): "SELECT id FROM incidents",
+    (True, False): "SELECT id FROM incidents WHERE source = ?",
+    (False, True): "SELECT id FROM incidents WHERE severity = ?",
+    (True, True): "SELECT id FROM incidents WHERE source = ? AND severity = ?",
+}
+
+
+# Blocking SQLite work below runs in worker threads (asyncio.to_thread) so a slow
+# query does not stall the event loop; pooled connections allow cross-thread use.
+def _fetch_incident_page(
+    sql: tuple[str, str, str],
+    params: list[object],
+    limit: int,
+    offset: int,
+    include_total: bool,
+) -> tuple[list[sqlite3.Row], int]:
+    page_sql, counted_page_sql, count_sql = sql
+    with db.get_reader() as conn:
+        if not include_total:
+            # Without the window count SQLite stops scanning once the page is full.
+            rows = conn.execute(page_sql, [*params, limit, offset]).fetchall()
+            return rows, offset + len(rows)
+
+        # The window count returns the filtered total alongside the page in one scan.
+        rows = conn.execute(counted_page_sql, [*params, limit, offset]).fetchall()
+
+        if rows:
+            return rows, rows[0]["_total"]
+        if offset:
+            # Paged past the end: no row carries the window count.
+            return rows, conn.execute(count_sql, params).fetchone()[0]
+        return rows, 0
+
+
+def _calculate_metrics(ids_sql: str, params: list[object]) -> MetricsResult:
+    with db.get_reader() as conn:
+        calc = MetricsCalculator(conn)
+
+        cursor = conn.execute(ids_sql, params)
+        rows = cursor.fetchall()
+        incident_ids = [r["id"] for r in rows] if rows else None
+
+        return calc.calculate(incident_ids)
+
+
+def _fetch_incident(incident_id: int) -> sqlite3.Row | None:
+    with db.get_reader() as conn:
+        return conn.execute("SELECT * FROM incidents WHERE id = ?", (incident_id,)).fetchone()
+
+
+def _delete_all_incidents() -> int:
+    # An unconditional DELETE only takes SQLite's truncate path (dropping whole
+    # b-trees instead of removing rows one by one) when no foreign key involves the
+    # table, so the ON DELETE CASCADE children are cleared by hand with enforcement
+    # switched off. The pragma is ignored inside a transaction, hence the ordering.
+    with db.get_writer() as conn:
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute("SELECT COUNT(*) FROM incidents").fetchone()[0]
+            conn.execute("DELETE FROM embeddings")
+            conn.execute("DELETE FROM cluster_members")
+            conn.execute("DELETE FROM incidents")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
+        return deleted
+
+
+@router.get("", response_model=IncidentListResponse, responses={401: AUTH_401_RESPONSE})
 async def list_incidents(
     current_user: AuthenticatedUser,
     source: IncidentSource | None = None,
     severity: Severity | None = None,
     offset: Annotated[int, Query(ge=0, le=9_223_372_036_854_775_807)] = 0,
     limit: Annotated[int, Query(ge=1, le=1_000)] = 100,
-) -> IncidentListResponse:
+    include_total: Annotated[
+        bool,
+        Query(
+            description=(
+                "Count every matching incident. When false, `total` is offset plus the "
+                "number of incidents returned."
+            )
+        ),
+    ] = False,
+) -> ORJSONResponse:
     """List all incidents with optional filters."""
     del current_user
-    conn = db.get_connection()
-    try:
-        # Build query with filters
-        query = "SELECT * FROM incidents WHERE 1=1"
-        params: list[object] = []
-
-        if source:
-            query += " AND source = ?"
-            params.append(source.value)
-
-        if severity:
-            query += " AND severity = ?"
-            params.append(severity.value)
-
-        # Add ordering and pagination
-        query += " ORDER BY occurred_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-
-        # Execute query
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
+    params: list[object] = []
+    if source:
+        params.append(source.value)
+    if severity:
+        params.append(severity.value)
+    sql = _LIST_SQL[(source is not None, severity is not None)]
 
-        # Convert rows to Incident models
-        incidents = []
-        for row in rows:
-            incidents.append(
-                Incident(
-                    id=row["id"],
-                    external_id=row["external_id"],
-                    source=IncidentSource(row["source"]),
-                    severity=Severity(row["severity"]),
-                    title=row["title"],
-                    description=row["description"] or "",
-                    occurred_at=datetime.fromisoformat(row["occurred_at"]),
-                    resolved_at=datetime.fromisoformat(row["resolved_at"])
-                    if row["resolved_at"]
-                    else None,
-                    raw_data=json.loads(row["raw_data"]),
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                )
-            )
-
-        # Get total count
-        count_query = "SELECT COUNT(*) as count FROM incidents WHERE 1=1"
-        count_params: list[object] = []
-
-        if source:
-            count_query += " AND source = ?"
-            count_params.append(source.value)
+    rows, total = await asyncio.to_thread(
+        _fetch_incident_page, sql, params, limit, offset, include_total
+    )
 
-        if severity:
-            count_query += " AND severity = ?"
-            count_params.append(severity.value)
-
-        total = conn.execute(count_query, count_params).fetchone()["count"]
-
-        return IncidentListResponse(
-            incidents=incidents,
-            total=total,
-            severity_filter=severity,
-        )
-    finally:
-        conn.close()
+    # Rows go straight to JSON, skipping Incident construction and response-model
+    # serialization; the route's response_model keeps the documented schema.
+    return ORJSONResponse(
+        {
+            "incidents": [_row_to_incident_json(row) for row in rows],
+            "total": total,
+            "severity_filter": severity.value if severity else None,
+        }
+    )
 
 
 @router.get("/metrics", response_model=MetricsResult, responses={401: AUTH_401_RESPONSE})
@@ -118,32 +244,14 @@ async def get_metrics(
 ) -> MetricsResult:
     """Calculate metrics for all or filtered incidents."""
     del current_user
-    conn = db.get_connection()
-    try:
-        calc = MetricsCalculator(conn)
-
-        # Build query to get incident IDs with filters
-        where_clauses = []
-        params = []
-        if source:
-            where_clauses.append("source = ?")
-            params.append(source.value)
-        if severity:
-            where_clauses.append("severity = ?")
-            params.append(severity.value)
-
-        # Safe: where_clauses contains only literal strings "source = ?" and "severity = ?"
-        # The params tuple contains the actual user input which is safely parameterized
-        where_sql = " AND ".join(where_clauses) if where_clauses else ""
-        query = f"SELECT id FROM incidents {('WHERE ' + where_sql) if where_sql else ''}"
-
-        cursor = conn.execute(query, tuple(params))
-        rows = cursor.fetchall()
-        incident_ids = [r["id"] for r in rows] if rows else None
+    params: list[object] = []
+    if source:
+        params.append(source.value)
+    if severity:
+        params.append(severity.value)
+    ids_sql = _METRICS_SQL[(source is not None, severity is not None)]
 
-        return calc.calculate(incident_ids)
-    finally:
-        conn.close()
+    return await asyncio.to_thread(_calculate_metrics, ids_sql, params)
 
 
 @router.get(
@@ -156,44 +264,16 @@ async def get_incident(
 ) -> IncidentResponse:
     """Get a specific incident by ID."""
     del current_user
-    conn = db.get_connection()
-    try:
-        cursor = conn.execute("SELECT * FROM incidents WHERE id = ?", (incident_id,))
-        row = cursor.fetchone()
-
-        if not row:
-            raise HTTPException(status_code=404, detail="Incident not found")
-
-        incident = Incident(
-            id=row["id"],
-            external_id=row["external_id"],
-            source=IncidentSource(row["source"]),
-            severity=Severity(row["severity"]),
-            title=row["title"],
-            description=row["description"] or "",
-            occurred_at=datetime.fromisoformat(row["occurred_at"]),
-            resolved_at=datetime.fromisoformat(row["resolved_at"]) if row["resolved_at"] else None,
-            raw_data=json.loads(row["raw_data"]),
-            created_at=datetime.fromisoformat(row["created_at"]),
-        )
-
-        return IncidentResponse(incident=incident)
-    finally:
-        conn.close()
+    row = await asyncio.to_thread(_fetch_incident, incident_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    return IncidentResponse(incident=_row_to_incident(row))
 
 
 @router.delete("", responses={401: AUTH_401_RESPONSE, 403: AUTH_403_RESPONSE})
 async def delete_all_incidents(current_user: AdminUser) -> dict:
     """Delete all incidents from the database."""
     del current_user
-    conn = db.get_connection()
-    try:
-        cursor = conn.execute("DELETE FROM incidents")
-        deleted = cursor.rowcount
-        conn.commit()
-        return {"deleted": deleted, "message": f"Deleted {deleted} incidents"}
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+    deleted = await asyncio.to_thread(_delete_all_incidents)
+    return {"deleted": deleted, "message": f"Deleted {deleted} incidents"}
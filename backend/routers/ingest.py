@@ -1,14 +1,20 @@
 """Incident ingestion router."""
 
+import asyncio
 import json
+import mmap
+import os
+from collections import defaultdict
 from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
 from typing import Annotated, Any
 
+import orjson
 from fastapi import APIRouter, Depends
 
-from config import settings
-from database import db
+from clients.http import HttpClient
+from config import get_settings
 from exceptions import JiraConnectionError, JiraQueryError, SlackAPIError
 from models.api import (
     IngestResponse,
@@ -18,6 +24,7 @@ from models.api import (
 )
 from models.incident import IncidentSource
 from security.auth import AuthUser, require_roles_dependency
+from services.incident_store import IncidentRow, incident_row, incident_write_queue
 from services.jira_client import JiraClient
 from services.normalizer import IncidentNormalizer
 from services.slack_client import SlackClient
@@ -32,7 +39,7 @@ def _resolve_safe_export_path(raw_path: str) -> Path:
     if json_file.suffix.lower() != ".json":
         raise ValueError("json_path must reference a .json file")
 
-    allowed_root = settings.slack_export_dir.expanduser().resolve()
+    allowed_root = get_settings().slack_export_dir.expanduser().resolve()
     try:
         json_file.relative_to(allowed_root)
     except ValueError as exc:
@@ -46,8 +53,83 @@ def _resolve_safe_export_path(raw_path: str) -> Path:
     return json_file
 
 
+def _load_export_file(json_file: Path) -> Any:
+    """Parse an export file straight from a read-only memory map.
+
+    orjson decodes the mapped UTF-8 bytes directly, so a large export is never
+    copied into a Python bytes or str object first.
+    """
+    with json_file.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap cannot map an empty file; let orjson report the empty document.
+            return orjson.loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return orjson.loads(view)
+
+
+def _group_by_thread(messages: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+    """Group messages by parent thread timestamp; unthreaded messages start their own.
+
+    Messages without a ts cannot be ordered or dated and are skipped. Timestamps are
+    strings: the Slack API returns them that way and ``SlackClient.parse_export``
+    normalizes export files.
+    """
+    threads: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+    for msg in messages:
+        ts = msg.get("ts")
+        if ts is None:
+            continue
+        threads[msg.get("thread_ts") or ts].append(msg)
+    return threads
+
+
+def _sort_thread(thread_msgs: list[dict[str, Any]]) -> None:
+    """Order a thread's messages chronologically, in place.
+
+    Slack ts values are fixed-width "seconds.micros" strings, so comparing them as
+    strings matches numeric order without a float() per message. API history arrives
+    oldest first, so this is a linear already-sorted check there; only export files,
+    whose order is not guaranteed, pay for a real sort.
+    """
+    thread_msgs.sort(key=itemgetter("ts"))
+
+
+# Normalization is pure Python and GIL-bound, so a thread pool would not run it in
+# parallel; each batch runs in one worker thread so the event loop stays free.
+# Failures are collected as (key, exception) pairs and formatted in one pass at the end.
+def _normalize_jira_issues(issues: list[dict[str, Any]]) -> tuple[list[IncidentRow], list[str]]:
+    rows = []
+    failures: list[tuple[object, Exception]] = []
+    for issue in issues:
+        try:
+            rows.append(incident_row(IncidentNormalizer.normalize_jira_issue(issue)))
+        except Exception as e:
+            failures.append((issue.get("key", "unknown"), e))
+    return rows, [f"Failed to normalize issue {key}: {e}" for key, e in failures]
+
+
+def _normalize_slack_messages(
+    messages: list[dict[str, Any]], channel: str, source: IncidentSource
+) -> tuple[list[IncidentRow], list[str]]:
+    rows = []
+    failures: list[tuple[str, Exception]] = []
+    for thread_ts, thread_msgs in _group_by_thread(messages).items():
+        try:
+            _sort_thread(thread_msgs)
+            incident = IncidentNormalizer.normalize_slack_thread(
+                messages=thread_msgs, channel=channel, source=source
+            )
+            rows.append(incident_row(incident))
+        except Exception as e:
+            failures.append((thread_ts, e))
+    return rows, [f"Failed to normalize thread {thread_ts}: {e}" for thread_ts, e in failures]
+
+
 @router.post("/jira")
-async def ingest_from_jira(request: JiraIngestRequest, current_user: AdminUser) -> IngestResponse:
+async def ingest_from_jira(
+    request: JiraIngestRequest, current_user: AdminUser, http_client: HttpClient
+) -> IngestResponse:
     """Ingest incidents from Jira using JQL query."""
     del current_user
     errors = []
@@ -60,69 +142,17 @@ async def ingest_from_jira(request: JiraIngestRequest, current_user: AdminUser)
             url=request.url,
             email=request.email,
             api_token=request.api_token,
+            http_client=http_client,
         )
 
         # Fetch issues
         issues = await client.search_issues(jql=request.jql)
 
-        # Normalize and insert each issue
-        conn = db.get_connection()
-        try:
-            for issue in issues:
-                try:
-                    incident = IncidentNormalizer.normalize_jira_issue(issue)
-
-                    # Check if row exists before upsert to track inserts vs updates
-                    check = conn.execute(
-                        "SELECT id FROM incidents WHERE external_id = ? AND source = ?",
-                        (incident.external_id, incident.source.value),
-                    ).fetchone()
-                    existed_before = check is not None
-
-                    # Prepare insert query
-                    cursor = conn.execute(
-                        """
-                        INSERT INTO incidents (
-                            external_id, source, severity, title, description,
-                            occurred_at, resolved_at, raw_data
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(external_id, source) DO UPDATE SET
-                            severity = excluded.severity,
-                            title = excluded.title,
-                            description = excluded.description,
-                            resolved_at = excluded.resolved_at,
-                            raw_data = excluded.raw_data
-                        """,
-                        (
-                            incident.external_id,
-                            incident.source.value,
-                            incident.severity.value,
-                            incident.title,
-                            incident.description,
-                            incident.occurred_at.isoformat(),
-                            incident.resolved_at.isoformat() if incident.resolved_at else None,
-                            json.dumps(incident.raw_data),
-                        ),
-                    )
-
-                    # Track whether this was an insert or update
-                    if cursor.rowcount > 0:
-                        if existed_before:
-                            updated += 1
-                        else:
-                            ingested += 1
-
-                except Exception as e:
-                    errors.append(
-                        f"Failed to normalize issue {issue.get('key', 'unknown')}: {str(e)}"
-                    )
-
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        # Normalize off the event loop, then store the batch
+        rows, normalize_errors = await asyncio.to_thread(_normalize_jira_issues, issues)
+        errors.extend(normalize_errors)
+
+        ingested, updated = await incident_write_queue.submit(rows)
 
     except JiraConnectionError as e:
         errors.append(f"Connection error: {e.message}")
@@ -139,7 +169,9 @@ async def ingest_from_jira(request: JiraIngestRequest, current_user: AdminUser)
 
 
 @router.post("/slack")
-async def ingest_from_slack(request: SlackIngestRequest, current_user: AdminUser) -> IngestResponse:
+async def ingest_from_slack(
+    request: SlackIngestRequest, current_user: AdminUser, http_client: HttpClient
+) -> IngestResponse:
     """Ingest incidents from Slack channel history."""
     del current_user
     errors = []
@@ -148,7 +180,7 @@ async def ingest_from_slack(request: SlackIngestRequest, current_user: AdminUser
 
     try:
         # Initialize Slack client
-        client = SlackClient(bot_token=request.bot_token)
+        client = SlackClient(bot_token=request.bot_token, http_client=http_client)
 
         # Calculate time range
         now = datetime.utcnow()
@@ -162,79 +194,13 @@ async def ingest_from_slack(request: SlackIngestRequest, current_user: AdminUser
             latest=latest,
         )
 
-        # Group messages by thread
-        threads: dict[str, list[dict[str, Any]]] = {}
-        for msg in messages:
-            raw_thread_ts = msg.get("thread_ts", msg.get("ts"))
-            if raw_thread_ts is None:
-                continue
-            thread_ts = str(raw_thread_ts)
-            if thread_ts not in threads:
-                threads[thread_ts] = []
-            threads[thread_ts].append(msg)
-
-        # Normalize and insert each thread
-        conn = db.get_connection()
-        try:
-            for thread_ts, thread_msgs in threads.items():
-                try:
-                    # Sort messages by timestamp
-                    thread_msgs.sort(key=lambda m: float(m.get("ts", "0")))
-
-                    incident = IncidentNormalizer.normalize_slack_thread(
-                        messages=thread_msgs,
-                        channel=request.channel_id,
-                        source=IncidentSource.SLACK,
-                    )
-
-                    # Check if row exists before upsert to track inserts vs updates
-                    check = conn.execute(
-                        "SELECT id FROM incidents WHERE external_id = ? AND source = ?",
-                        (incident.external_id, incident.source.value),
-                    ).fetchone()
-                    existed_before = check is not None
-
-                    # Insert or update
-                    cursor = conn.execute(
-                        """
-                        INSERT INTO incidents (
-                            external_id, source, severity, title, description,
-                            occurred_at, resolved_at, raw_data
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(external_id, source) DO UPDATE SET
-                            severity = excluded.severity,
-                            title = excluded.title,
-                            description = excluded.description,
-                            resolved_at = excluded.resolved_at,
-                            raw_data = excluded.raw_data
-                        """,
-                        (
-                            incident.external_id,
-                            incident.source.value,
-                            incident.severity.value,
-                            incident.title,
-                            incident.description,
-                            incident.occurred_at.isoformat(),
-                            incident.resolved_at.isoformat() if incident.resolved_at else None,
-                            json.dumps(incident.raw_data),
-                        ),
-                    )
-
-                    if cursor.rowcount > 0:
-                        if existed_before:
-                            updated += 1
-                        else:
-                            ingested += 1
-
-                except Exception as e:
-                    errors.append(f"Failed to normalize thread {thread_ts}: {str(e)}")
-
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        # Group and normalize off the event loop, then store the batch
+        rows, normalize_errors = await asyncio.to_thread(
+            _normalize_slack_messages, messages, request.channel_id, IncidentSource.SLACK
+        )
+        errors.extend(normalize_errors)
+
+        ingested, updated = await incident_write_queue.submit(rows)
 
     except SlackAPIError as e:
         errors.append(f"Slack API error: {e.message}")
@@ -264,7 +230,7 @@ async def ingest_from_slack_export(
             export_data = request.json_content
         elif request.json_path is not None:
             json_file = _resolve_safe_export_path(request.json_path)
-            export_data = json_file.read_text(encoding="utf-8")
+            export_data = await asyncio.to_thread(_load_export_file, json_file)
         else:
             # Should be unreachable due request model validation.
             raise ValueError("Either json_content or json_path must be provided")
@@ -272,77 +238,16 @@ async def ingest_from_slack_export(
         # Parse export
         messages = SlackClient.parse_export(export_data)
 
-        # Group by thread
-        threads: dict[str, list[dict[str, Any]]] = {}
-        for msg in messages:
-            raw_thread_ts = msg.get("thread_ts", msg.get("ts"))
-            if raw_thread_ts is None:
-                continue
-            thread_ts = str(raw_thread_ts)
-            if thread_ts not in threads:
-                threads[thread_ts] = []
-            threads[thread_ts].append(msg)
-
-        # Normalize and insert
-        conn = db.get_connection()
-        try:
-            for thread_ts, thread_msgs in threads.items():
-                try:
-                    thread_msgs.sort(key=lambda m: float(m.get("ts", "0")))
-
-                    incident = IncidentNormalizer.normalize_slack_thread(
-                        messages=thread_msgs,
-                        channel=request.channel_name,
-                        source=IncidentSource.SLACK_EXPORT,
-                    )
-
-                    # Check if row exists before upsert to track inserts vs updates
-                    check = conn.execute(
-                        "SELECT id FROM incidents WHERE external_id = ? AND source = ?",
-                        (incident.external_id, incident.source.value),
-                    ).fetchone()
-                    existed_before = check is not None
-
-                    cursor = conn.execute(
-                        """
-                        INSERT INTO incidents (
-                            external_id, source, severity, title, description,
-                            occurred_at, resolved_at, raw_data
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(external_id, source) DO UPDATE SET
-                            severity = excluded.severity,
-                            title = excluded.title,
-                            description = excluded.description,
-                            resolved_at = excluded.resolved_at,
-                            raw_data = excluded.raw_data
-                        """,
-                        (
-                            incident.external_id,
-                            incident.source.value,
-                            incident.severity.value,
-                            incident.title,
-                            incident.description,
-                            incident.occurred_at.isoformat(),
-                            incident.resolved_at.isoformat() if incident.resolved_at else None,
-                            json.dumps(incident.raw_data),
-                        ),
-                    )
-
-                    if cursor.rowcount > 0:
-                        if existed_before:
-                            updated += 1
-                        else:
-                            ingested += 1
-
-                except Exception as e:
-                    errors.append(f"Failed to normalize thread {thread_ts}: {str(e)}")
-
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        # Group and normalize off the event loop, then store the batch
+        rows, normalize_errors = await asyncio.to_thread(
+            _normalize_slack_messages,
+            messages,
+            request.channel_name,
+            IncidentSource.SLACK_EXPORT,
+        )
+        errors.extend(normalize_errors)
+
+        ingested, updated = await incident_write_queue.submit(rows)
 
     except FileNotFoundError:
         errors.append(f"File not found: {request.json_path}")
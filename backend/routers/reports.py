@@ -1,15 +1,19 @@
 """Report generation router."""
 
-import json
+import asyncio
 import os
+import sqlite3
+from collections import defaultdict
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Annotated
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 
+from api.responses import ORJSONResponse
 from database import db
 from exceptions import OllamaModelNotFoundError, OllamaUnavailableError
 from models.api import ReportGenerateRequest
@@ -18,7 +22,7 @@ from models.report import MetricsResult, ReportResult
 from security.auth import AuthUser, require_roles_dependency
 from services.docx_generator import DocxGenerator
 from services.metrics import MetricsCalculator
-from services.ollama_client import OllamaClient
+from services.ollama_client import Ollama
 from services.summarizer import ClusterSummarizer
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -52,9 +56,12 @@ def _fallback_executive_summary(
 
 
 @router.post("/generate")
-async def generate_report(request: ReportGenerateRequest, current_user: AdminUser) -> dict:
+async def generate_report(
+    request: ReportGenerateRequest, current_user: AdminUser, ollama: Ollama
+) -> dict:
     """Generate a Word document report for a cluster run."""
     del current_user
+    # Dedicated connection: report generation awaits Ollama while holding it.
     conn = db.get_connection()
 
     try:
@@ -69,63 +76,55 @@ async def generate_report(request: ReportGenerateRequest, current_user: AdminUse
 
         run_id = run_row["id"]
 
-        # Get clusters for this run
+        # Clusters and their members in one pass; the LEFT JOIN keeps empty clusters
         cursor = conn.execute(
             """
-            SELECT id, cluster_label, summary, centroid_text
-            FROM clusters
-            WHERE run_id = ?
-            ORDER BY id
+            SELECT c.id, c.cluster_label, c.summary, c.centroid_text, cm.incident_id
+            FROM clusters c
+            LEFT JOIN cluster_members cm ON cm.cluster_id = c.id
+            WHERE c.run_id = ?
+            ORDER BY c.id, cm.incident_id
             """,
             (run_id,),
         )
-        cluster_rows = cursor.fetchall()
+        cluster_rows: dict[int, sqlite3.Row] = {}
+        members: defaultdict[int, list[int]] = defaultdict(list)
+        for row in cursor:
+            cluster_rows.setdefault(row["id"], row)
+            if row["incident_id"] is not None:
+                members[row["id"]].append(row["incident_id"])
 
         # Build cluster results
-        clusters = []
-        for cluster_row in cluster_rows:
-            cluster_id = cluster_row["id"]
-
-            # Get incident IDs for this cluster
-            cursor = conn.execute(
-                "SELECT incident_id FROM cluster_members WHERE cluster_id = ?",
-                (cluster_id,),
-            )
-            incident_ids = [r["incident_id"] for r in cursor.fetchall()]
-
-            clusters.append(
-                ClusterResult(
-                    cluster_id=cluster_row["cluster_label"],
-                    incident_ids=incident_ids,
-                    size=len(incident_ids),
-                    summary=cluster_row["summary"],
-                    centroid_text=cluster_row["centroid_text"],
-                )
+        clusters = [
+            ClusterResult.model_construct(
+                cluster_id=cluster_row["cluster_label"],
+                incident_ids=members[cluster_db_id],
+                size=len(members[cluster_db_id]),
+                summary=cluster_row["summary"],
+                centroid_text=cluster_row["centroid_text"],
             )
+            for cluster_db_id, cluster_row in cluster_rows.items()
+        ]
 
         # Calculate metrics
         calc = MetricsCalculator(conn)
         metrics = calc.calculate()
 
         # Generate executive summary
-        ollama = OllamaClient()
+        summarizer = ClusterSummarizer(ollama, conn)
         try:
-            summarizer = ClusterSummarizer(ollama, conn)
-            try:
-                executive_summary = await summarizer.generate_executive_summary(
-                    quarter=request.quarter_label,
-                    metrics=metrics,
-                    clusters=clusters,
-                )
-            except (OllamaUnavailableError, OllamaModelNotFoundError) as error:
-                executive_summary = _fallback_executive_summary(
-                    quarter=request.quarter_label,
-                    metrics=metrics,
-                    clusters=clusters,
-                    error=error,
-                )
-        finally:
-            await ollama.close()
+            executive_summary = await summarizer.generate_executive_summary(
+                quarter=request.quarter_label,
+                metrics=metrics,
+                clusters=clusters,
+            )
+        except (OllamaUnavailableError, OllamaModelNotFoundError) as error:
+            executive_summary = _fallback_executive_summary(
+                quarter=request.quarter_label,
+                metrics=metrics,
+                clusters=clusters,
+                error=error,
+            )
 
         # Create report record
         report_id = str(uuid4())
@@ -144,8 +143,12 @@ async def generate_report(request: ReportGenerateRequest, current_user: AdminUse
         output_dir.mkdir(parents=True, exist_ok=True)
         output_path = output_dir / f"{report_id}.docx"
 
+        # python-docx builds the XML, embeds the charts and deflates the package, all
+        # blocking work, so it runs in a worker thread.
         generator = DocxGenerator()
-        generator.generate(report, clusters, request.chart_pngs, str(output_path))
+        await asyncio.to_thread(
+            generator.generate, report, clusters, request.chart_pngs, str(output_path)
+        )
 
         report.docx_path = str(output_path)
 
@@ -177,12 +180,19 @@ async def generate_report(request: ReportGenerateRequest, current_user: AdminUse
         conn.close()
 
 
-@router.get("")
-async def list_reports() -> list[ReportResult]:
-    """List all generated reports."""
-    conn = db.get_connection()
+# Defaults for metrics fields added after a report may have been stored, so older
+# rows still serialize every field of MetricsResult.
+_METRICS_DEFAULTS = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in MetricsResult.model_fields.items()
+    if not field.is_required()
+}
 
-    try:
+
+@router.get("", response_model=list[ReportResult])
+async def list_reports() -> ORJSONResponse:
+    """List all generated reports."""
+    with db.get_reader() as conn:
         cursor = conn.execute(
             """
             SELECT id, cluster_run_id, title, executive_summary,
@@ -193,51 +203,67 @@ async def list_reports() -> list[ReportResult]:
         )
         rows = cursor.fetchall()
 
-        reports = []
-        for row in rows:
-            metrics = MetricsResult(**json.loads(row["metrics_json"]))
-            reports.append(
-                ReportResult(
-                    report_id=row["id"],
-                    cluster_run_id=row["cluster_run_id"],
-                    title=row["title"],
-                    executive_summary=row["executive_summary"],
-                    metrics=metrics,
-                    created_at=row["created_at"],
-                    docx_path=row["docx_path"],
-                )
-            )
+    # metrics_json was written by MetricsResult.model_dump_json, so rows go straight to
+    # JSON without building and re-validating report models; the route's
+    # response_model keeps the documented schema.
+    return ORJSONResponse(
+        [
+            {
+                "report_id": row["id"],
+                "cluster_run_id": row["cluster_run_id"],
+                "title": row["title"],
+                "executive_summary": row["executive_summary"],
+                "metrics": _METRICS_DEFAULTS | orjson.loads(row["metrics_json"]),
+                "docx_path": row["docx_path"],
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
+    )
 
-        return reports
 
-    finally:
-        conn.close()
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against a response ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
 
 @router.get("/{report_id}/download")
-async def download_report(report_id: str) -> FileResponse:
+async def download_report(report_id: str, request: Request) -> Response:
     """Download a generated report."""
-    conn = db.get_connection()
-
-    try:
+    with db.get_reader() as conn:
         cursor = conn.execute("SELECT docx_path, title FROM reports WHERE id = ?", (report_id,))
         row = cursor.fetchone()
 
-        if not row or not row["docx_path"]:
-            raise HTTPException(status_code=404, detail="Report not found")
-
-        docx_path = row["docx_path"]
-        if not os.path.exists(docx_path):
-            raise HTTPException(status_code=404, detail="DOCX file not found on disk")
+    if not row or not row["docx_path"]:
+        raise HTTPException(status_code=404, detail="Report not found")
 
-        # Create filename from report title
-        filename = f"{row['title'].replace(' ', '_')}_{report_id[:8]}.docx"
+    docx_path = row["docx_path"]
+    try:
+        # Handed to FileResponse so it does not stat the file a second time.
+        stat_result = os.stat(docx_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="DOCX file not found on disk")
+
+    # Create filename from report title
+    filename = f"{row['title'].replace(' ', '_')}_{report_id[:8]}.docx"
+
+    response = FileResponse(
+        path=docx_path,
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        filename=filename,
+        stat_result=stat_result,
+    )
 
-        return FileResponse(
-            path=docx_path,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename=filename,
+    # A client revalidating its cached copy gets a 304 instead of the file again.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, response.headers["etag"]):
+        return Response(
+            status_code=304,
+            headers={
+                "etag": response.headers["etag"],
+                "last-modified": response.headers["last-modified"],
+            },
         )
-
-    finally:
-        conn.close()
+    return response
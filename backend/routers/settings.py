@@ -4,6 +4,7 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends
 
+from clients.http import HttpClient
 from exceptions import JiraConnectionError, SlackAPIError
 from models.api import (
     JiraConnectionTestRequest,
@@ -22,6 +23,7 @@ AdminUser = Annotated[AuthUser, Depends(require_roles_dependency({"admin"}))]
 async def test_jira_connection(
     request: JiraConnectionTestRequest,
     current_user: AdminUser,
+    http_client: HttpClient,
 ) -> TestConnectionResponse:
     """Test Jira connection with provided credentials."""
     del current_user
@@ -29,6 +31,7 @@ async def test_jira_connection(
         url=request.url,
         email=request.email,
         api_token=request.api_token,
+        http_client=http_client,
     )
 
     try:
@@ -61,10 +64,11 @@ async def test_jira_connection(
 async def test_slack_connection(
     request: SlackConnectionTestRequest,
     current_user: AdminUser,
+    http_client: HttpClient,
 ) -> TestConnectionResponse:
     """Test Slack connection with provided bot token."""
     del current_user
-    client = SlackClient(bot_token=request.bot_token)
+    client = SlackClient(bot_token=request.bot_token, http_client=http_client)
 
     try:
         auth_info = await client.test_connection()
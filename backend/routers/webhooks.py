@@ -2,16 +2,73 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import Any
 
+import orjson
 from fastapi import APIRouter, Request
 
 from api.problem import problem_response
+from api.versioning import client_path
 from database import db
-from services.webhooks import normalize_payload, verify_signature
+from services.webhooks import new_signature_mac, normalize_payload, signature_matches
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
+# Recently stored deliveries, so provider retries are answered without parsing the
+# payload or touching SQLite. Only the event loop touches it, so it needs no lock.
+_SEEN_DELIVERY_TTL_SECONDS = 3600.0
+_SEEN_DELIVERY_MAX_ENTRIES = 100_000
+_seen_deliveries: OrderedDict[tuple[str, str], float] = OrderedDict()
+
+
+def _recently_seen(key: tuple[str, str], now: float) -> bool:
+    seen_at = _seen_deliveries.get(key)
+    if seen_at is None:
+        return False
+    if now - seen_at >= _SEEN_DELIVERY_TTL_SECONDS:
+        del _seen_deliveries[key]
+        return False
+    return True
+
+
+def _remember_delivery(key: tuple[str, str], now: float) -> None:
+    _seen_deliveries[key] = now
+    _seen_deliveries.move_to_end(key)
+    if len(_seen_deliveries) > _SEEN_DELIVERY_MAX_ENTRIES:
+        _seen_deliveries.popitem(last=False)
+
+
+def _store_receipt(provider: str, delivery_id: str, payload: dict[str, Any]) -> bool:
+    """Record a delivery and queue its job; returns False for an already-seen delivery.
+
+    Runs in a worker thread so the writer lock wait and commit stay off the event loop.
+    """
+    payload_json = orjson.dumps(payload).decode()
+    with db.get_writer() as conn:
+        # The unique (provider, delivery_id) key doubles as the dedupe check.
+        cursor = conn.execute(
+            """
+            INSERT INTO webhook_receipts (provider, delivery_id, signature_valid, payload)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (provider, delivery_id) DO NOTHING
+            """,
+            (provider, delivery_id, 1, payload_json),
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        conn.execute(
+            """
+            INSERT INTO webhook_jobs (provider, delivery_id, payload, status)
+            VALUES (?, ?, ?, 'queued')
+            """,
+            (provider, delivery_id, payload_json),
+        )
+    return True
+
 
 @router.post("/{provider}", response_model=None)
 async def ingest_webhook(provider: str, request: Request) -> object:
@@ -33,9 +90,9 @@ async def ingest_webhook(provider: str, request: Request) -> object:
             title="Bad Request",
             detail="Missing webhook delivery identifier header.",
             type_="https://incident-workbench.dev/problems/webhook-delivery-id",
-            instance=str(request.url.path),
-            request_id=getattr(request.state, "request_id", None),
-            trace_id=getattr(request.state, "trace_id", None),
+            instance=client_path(request.scope),
+            request_id=request.scope.get("request_id"),
+            trace_id=request.scope.get("trace_id"),
         )
 
     if not signature:
@@ -44,65 +101,57 @@ async def ingest_webhook(provider: str, request: Request) -> object:
             title="Bad Request",
             detail="Missing webhook signature header.",
             type_="https://incident-workbench.dev/problems/webhook-signature-missing",
-            instance=str(request.url.path),
-            request_id=getattr(request.state, "request_id", None),
-            trace_id=getattr(request.state, "trace_id", None),
+            instance=client_path(request.scope),
+            request_id=request.scope.get("request_id"),
+            trace_id=request.scope.get("trace_id"),
         )
 
-    body = await request.body()
-    signature_valid = verify_signature(provider=provider, body=body, signature=signature)
-    if not signature_valid:
+    # Hash the body as it streams in rather than after buffering it, so the only
+    # full copy held is the one the payload is parsed from.
+    mac = new_signature_mac(provider)
+    body = bytearray()
+    async for chunk in request.stream():
+        mac.update(chunk)
+        body += chunk
+
+    if not signature_matches(mac, signature):
         return problem_response(
             status=401,
             title="Unauthorized",
             detail="Webhook signature verification failed.",
             type_="https://incident-workbench.dev/problems/webhook-signature-invalid",
-            instance=str(request.url.path),
-            request_id=getattr(request.state, "request_id", None),
-            trace_id=getattr(request.state, "trace_id", None),
+            instance=client_path(request.scope),
+            request_id=request.scope.get("request_id"),
+            trace_id=request.scope.get("trace_id"),
         )
 
-    payload = normalize_payload(body)
-
-    conn = db.get_connection()
-    try:
-        existing = conn.execute(
-            "SELECT id FROM webhook_receipts WHERE provider = ? AND delivery_id = ?",
-            (provider, delivery_id),
-        ).fetchone()
-        if existing:
-            return {
-                "status": "duplicate",
-                "provider": provider,
-                "delivery_id": delivery_id,
-                "queued": False,
-            }
-
-        conn.execute(
-            """
-            INSERT INTO webhook_receipts (provider, delivery_id, signature_valid, payload)
-            VALUES (?, ?, ?, ?)
-            """,
-            (provider, delivery_id, 1, json.dumps(payload)),
-        )
+    # Checked only after the signature, so unsigned requests cannot probe which
+    # deliveries were received.
+    delivery_key = (provider, delivery_id)
+    now = monotonic()
+    if _recently_seen(delivery_key, now):
+        return {
+            "status": "duplicate",
+            "provider": provider,
+            "delivery_id": delivery_id,
+            "queued": False,
+        }
 
-        conn.execute(
-            """
-            INSERT INTO webhook_jobs (provider, delivery_id, payload, status)
-            VALUES (?, ?, ?, 'queued')
-            """,
-            (provider, delivery_id, json.dumps(payload)),
-        )
+    payload = normalize_payload(body)
 
-        conn.commit()
+    queued = await asyncio.to_thread(_store_receipt, provider, delivery_id, payload)
+    _remember_delivery(delivery_key, now)
+    if not queued:
         return {
-            "status": "accepted",
+            "status": "duplicate",
             "provider": provider,
             "delivery_id": delivery_id,
-            "queued": True,
+            "queued": False,
         }
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+
+    return {
+        "status": "accepted",
+        "provider": provider,
+        "delivery_id": delivery_id,
+        "queued": True,
+    }
@@ -2,34 +2,43 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import hashlib
 import hmac
 import json
+import logging
 import secrets
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from threading import BoundedSemaphore, Lock
+from time import monotonic
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, Request, Response
 
-from config import settings
+from config import get_settings
 from database import db
 from security.rbac import require_role
 from security.settings import (
     CSRF_COOKIE_NAME,
+    CSRF_COOKIE_NAMES,
     INSECURE_CSRF_COOKIE_NAME,
     INSECURE_SESSION_COOKIE_NAME,
     SESSION_COOKIE_HTTPONLY,
     SESSION_COOKIE_NAME,
+    SESSION_COOKIE_NAMES,
     SESSION_COOKIE_SAMESITE,
     SESSION_TTL_SECONDS,
     active_cookie_names,
     cookie_secure_for_scheme,
-    csrf_cookie_name_candidates,
-    session_cookie_name_candidates,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass(slots=True)
 class AuthUser:
@@ -40,6 +49,115 @@ class AuthUser:
     roles: set[str]
 
 
+# Resolved sessions are cached per token hash so authenticated requests skip the
+# session/user lookup. Entries are re-read after the TTL, which bounds how long a role
+# change made directly in the database takes to apply; revocation through this
+# process drops the entry at once.
+_SESSION_CACHE_TTL_SECONDS = 60.0
+_SESSION_CACHE_MAX_ENTRIES = 10_000
+# last_seen_at is activity bookkeeping: it is recorded at most this often per session
+# and written in batches by LastSeenFlusher, so read-only requests never take the
+# writer lock.
+_LAST_SEEN_WRITE_INTERVAL_SECONDS = 30.0
+
+
+@dataclass(slots=True)
+class _CachedSession:
+    user: AuthUser
+    expires_at: datetime
+    cached_at: float
+    last_seen_written_at: float
+
+
+_session_cache: OrderedDict[str, _CachedSession] = OrderedDict()
+_session_cache_lock = Lock()
+
+
+def _cached_session(token_hash: str, now: float) -> _CachedSession | None:
+    with _session_cache_lock:
+        cached = _session_cache.get(token_hash)
+        if cached is None:
+            return None
+        if now - cached.cached_at >= _SESSION_CACHE_TTL_SECONDS:
+            del _session_cache[token_hash]
+            return None
+        _session_cache.move_to_end(token_hash)
+        return cached
+
+
+def _cache_session(token_hash: str, cached: _CachedSession) -> None:
+    with _session_cache_lock:
+        _session_cache[token_hash] = cached
+        _session_cache.move_to_end(token_hash)
+        if len(_session_cache) > _SESSION_CACHE_MAX_ENTRIES:
+            _session_cache.popitem(last=False)
+
+
+def _forget_session(token_hash: str) -> None:
+    with _session_cache_lock:
+        _session_cache.pop(token_hash, None)
+
+
+class LastSeenFlusher:
+    """Collect session last_seen_at updates and write them in one batch per interval.
+
+    ``record`` is called from request threads; the latest timestamp per session wins.
+    Before ``start()`` (e.g. when the app lifespan has not run) updates are written
+    immediately.
+    """
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._pending: dict[str, str] = {}
+        self._lock = Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="session-last-seen-flusher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self.flush)
+
+    def record(self, token_hash: str, seen_at: str) -> None:
+        if self._task is None:
+            _write_last_seen([(seen_at, token_hash)])
+            return
+        with self._lock:
+            self._pending[token_hash] = seen_at
+
+    def flush(self) -> int:
+        """Write pending updates; returns how many sessions were updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            _write_last_seen([(seen_at, token_hash) for token_hash, seen_at in pending.items()])
+        return len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("failed to flush session last_seen_at updates")
+
+
+def _write_last_seen(updates: list[tuple[str, str]]) -> None:
+    with db.get_writer() as conn:
+        conn.executemany("UPDATE sessions SET last_seen_at = ? WHERE token_hash = ?", updates)
+
+
+last_seen_flusher = LastSeenFlusher(interval_seconds=5.0)
+
+
 def _utc_now() -> datetime:
     return datetime.now(UTC)
 
@@ -48,6 +166,25 @@ def _hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
+# New hashes use scrypt (memory-hard) at the OWASP baseline cost: N=2**17, r=8, p=1,
+# about 128 MiB per derivation. PBKDF2 hashes from before still verify and are
+# upgraded on the next successful login.
+_SCRYPT_N = 2**17
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+_SCRYPT_PREFIX = f"scrypt${_SCRYPT_N}${_SCRYPT_R}${_SCRYPT_P}$"
+
+
+@lru_cache(maxsize=None)
+def _scrypt_slots(concurrency: int) -> BoundedSemaphore:
+    """Shared semaphore capping concurrent derivations at ``concurrency``.
+
+    Login is unauthenticated, so derivations are capped to keep a burst of attempts
+    within password_hash_concurrency * 128 MiB; further callers wait their turn.
+    """
+    return BoundedSemaphore(concurrency)
+
+
 def _encode_password_hash(*, password: str, salt: bytes, iterations: int) -> str:
     digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
     encoded_salt = base64.urlsafe_b64encode(salt).decode("utf-8")
@@ -55,27 +192,59 @@ def _encode_password_hash(*, password: str, salt: bytes, iterations: int) -> str
     return f"pbkdf2_sha256${iterations}${encoded_salt}${encoded_digest}"
 
 
-def hash_password(password: str, *, iterations: int = 600_000) -> str:
+def _encode_scrypt_hash(*, password: str, salt: bytes, n: int, r: int, p: int) -> str:
+    with _scrypt_slots(get_settings().password_hash_concurrency):
+        digest = hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            # OpenSSL's working-set size for these parameters; its default cap is 32 MiB.
+            maxmem=128 * r * (n + p + 2),
+            dklen=32,
+        )
+    encoded_salt = base64.urlsafe_b64encode(salt).decode("utf-8")
+    encoded_digest = base64.urlsafe_b64encode(digest).decode("utf-8")
+    return f"scrypt${n}${r}${p}${encoded_salt}${encoded_digest}"
+
+
+def hash_password(password: str) -> str:
     salt = secrets.token_bytes(16)
-    return _encode_password_hash(password=password, salt=salt, iterations=iterations)
+    return _encode_scrypt_hash(password=password, salt=salt, n=_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P)
+
+
+def password_needs_rehash(encoded_hash: str) -> bool:
+    """True for hashes not using the current algorithm and cost parameters."""
+    return not encoded_hash.startswith(_SCRYPT_PREFIX)
 
 
 def verify_password(password: str, encoded_hash: str) -> bool:
     try:
-        algorithm, iteration_raw, encoded_salt, encoded_digest = encoded_hash.split("$")
-        if algorithm != "pbkdf2_sha256":
+        algorithm, params = encoded_hash.split("$", maxsplit=1)
+        if algorithm == "scrypt":
+            n_raw, r_raw, p_raw, encoded_salt, _ = params.split("$")
+            salt = base64.urlsafe_b64decode(encoded_salt.encode("utf-8"))
+            expected = _encode_scrypt_hash(
+                password=password, salt=salt, n=int(n_raw), r=int(r_raw), p=int(p_raw)
+            )
+        elif algorithm == "pbkdf2_sha256":
+            iteration_raw, encoded_salt, _ = params.split("$")
+            salt = base64.urlsafe_b64decode(encoded_salt.encode("utf-8"))
+            expected = _encode_password_hash(
+                password=password, salt=salt, iterations=int(iteration_raw)
+            )
+        else:
             return False
-        iterations = int(iteration_raw)
-        salt = base64.urlsafe_b64decode(encoded_salt.encode("utf-8"))
     except (ValueError, TypeError):
         return False
 
-    expected = _encode_password_hash(password=password, salt=salt, iterations=iterations)
     return hmac.compare_digest(expected, encoded_hash)
 
 
 def ensure_bootstrap_admin() -> None:
     """Create a local bootstrap admin user if missing."""
+    settings = get_settings()
     if not settings.auth_enabled:
         return
 
@@ -84,8 +253,7 @@ def ensure_bootstrap_admin() -> None:
     if not username or not password:
         return
 
-    conn = db.get_connection()
-    try:
+    with db.get_writer() as conn:
         existing = conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
         if existing is not None:
             return
@@ -97,28 +265,31 @@ def ensure_bootstrap_admin() -> None:
             """,
             (username, hash_password(password), json.dumps(["admin"])),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def authenticate_credentials(username: str, password: str) -> AuthUser | None:
-    conn = db.get_connection()
-    try:
+    with db.get_reader() as conn:
         row = conn.execute(
             "SELECT id, username, password_hash, roles FROM users WHERE username = ?",
             (username,),
         ).fetchone()
-        if row is None:
-            return None
+    if row is None:
+        return None
 
-        if not verify_password(password, row["password_hash"]):
-            return None
+    if not verify_password(password, row["password_hash"]):
+        return None
 
-        roles = set(json.loads(row["roles"]))
-        return AuthUser(user_id=row["id"], username=row["username"], roles=roles)
-    finally:
-        conn.close()
+    if password_needs_rehash(row["password_hash"]):
+        # Derive before borrowing the writer so the lock is not held during scrypt.
+        upgraded_hash = hash_password(password)
+        with db.get_writer() as conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ?",
+                (upgraded_hash, row["id"]),
+            )
+
+    roles = set(json.loads(row["roles"]))
+    return AuthUser(user_id=row["id"], username=row["username"], roles=roles)
 
 
 def create_session(*, response: Response, user_id: int, request_scheme: str) -> str:
@@ -127,8 +298,7 @@ def create_session(*, response: Response, user_id: int, request_scheme: str) ->
     csrf_token = secrets.token_urlsafe(24)
     expires_at = (_utc_now() + timedelta(seconds=SESSION_TTL_SECONDS)).isoformat()
 
-    conn = db.get_connection()
-    try:
+    with db.get_writer() as conn:
         conn.execute(
             """
             INSERT INTO sessions (token_hash, user_id, csrf_token, expires_at)
@@ -136,9 +306,6 @@ def create_session(*, response: Response, user_id: int, request_scheme: str) ->
             """,
             (token_hash, user_id, csrf_token, expires_at),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
     secure_cookie = cookie_secure_for_scheme(request_scheme)
     session_cookie_name, csrf_cookie_name = active_cookie_names(request_scheme)
@@ -168,8 +335,8 @@ def revoke_session_by_token(token: str | None) -> None:
         return
 
     token_hash = _hash_token(token)
-    conn = db.get_connection()
-    try:
+    _forget_session(token_hash)
+    with db.get_writer() as conn:
         conn.execute(
             """
             UPDATE sessions
@@ -178,9 +345,6 @@ def revoke_session_by_token(token: str | None) -> None:
             """,
             (_utc_now().isoformat(), _utc_now().isoformat(), token_hash),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def clear_auth_cookies(*, response: Response, request_scheme: str) -> None:
@@ -215,34 +379,25 @@ def clear_auth_cookies(*, response: Response, request_scheme: str) -> None:
     )
 
 
-def session_token_from_request(request: Request) -> str | None:
-    for cookie_name in session_cookie_name_candidates():
-        token = request.cookies.get(cookie_name)
+def _first_cookie(request: Request, names: tuple[str, ...]) -> str | None:
+    cookies = request.cookies
+    for cookie_name in names:
+        token = cookies.get(cookie_name)
         if token:
             return token
     return None
 
 
-def csrf_token_from_request(request: Request) -> str | None:
-    for cookie_name in csrf_cookie_name_candidates():
-        token = request.cookies.get(cookie_name)
-        if token:
-            return token
-    return None
+def session_token_from_request(request: Request) -> str | None:
+    return _first_cookie(request, SESSION_COOKIE_NAMES)
 
 
-def get_current_user(request: Request) -> AuthUser:
-    if not settings.auth_enabled:
-        return AuthUser(user_id=0, username="auth-disabled", roles={"admin"})
-
-    token = session_token_from_request(request)
-    if not token:
-        raise HTTPException(status_code=401, detail="Authentication required")
+def csrf_token_from_request(request: Request) -> str | None:
+    return _first_cookie(request, CSRF_COOKIE_NAMES)
 
-    token_hash = _hash_token(token)
 
-    conn = db.get_connection()
-    try:
+def _load_session(token_hash: str, now: float) -> _CachedSession:
+    with db.get_reader() as conn:
         row = conn.execute(
             """
             SELECT u.id, u.username, u.roles, s.expires_at
@@ -253,36 +408,70 @@ def get_current_user(request: Request) -> AuthUser:
             (token_hash,),
         ).fetchone()
 
-        if row is None:
-            raise HTTPException(status_code=401, detail="Invalid session")
+    if row is None:
+        raise HTTPException(status_code=401, detail="Invalid session")
+
+    cached = _CachedSession(
+        user=AuthUser(
+            user_id=row["id"], username=row["username"], roles=set(json.loads(row["roles"]))
+        ),
+        expires_at=datetime.fromisoformat(row["expires_at"]),
+        cached_at=now,
+        last_seen_written_at=float("-inf"),
+    )
+    _cache_session(token_hash, cached)
+    return cached
 
-        expires_at = datetime.fromisoformat(row["expires_at"])
-        if expires_at < _utc_now():
+
+def get_current_user(request: Request) -> AuthUser:
+    if not get_settings().auth_enabled:
+        return AuthUser(user_id=0, username="auth-disabled", roles={"admin"})
+
+    token = session_token_from_request(request)
+    if not token:
+        raise HTTPException(status_code=401, detail="Authentication required")
+
+    token_hash = _hash_token(token)
+    now = monotonic()
+    cached = _cached_session(token_hash, now)
+    if cached is None:
+        cached = _load_session(token_hash, now)
+
+    if cached.expires_at < _utc_now():
+        _forget_session(token_hash)
+        with db.get_writer() as conn:
             conn.execute(
                 "UPDATE sessions SET revoked_at = ? WHERE token_hash = ?",
                 (_utc_now().isoformat(), token_hash),
             )
-            conn.commit()
-            raise HTTPException(status_code=401, detail="Session expired")
+        raise HTTPException(status_code=401, detail="Session expired")
+
+    if now - cached.last_seen_written_at >= _LAST_SEEN_WRITE_INTERVAL_SECONDS:
+        cached.last_seen_written_at = now
+        last_seen_flusher.record(token_hash, _utc_now().isoformat())
+
+    return cached.user
+
+
+_role_dependencies: dict[frozenset[str], Callable[..., AuthUser]] = {}
 
-        conn.execute(
-            "UPDATE sessions SET last_seen_at = ? WHERE token_hash = ?",
-            (_utc_now().isoformat(), token_hash),
-        )
-        conn.commit()
 
-        roles = set(json.loads(row["roles"]))
-        return AuthUser(user_id=row["id"], username=row["username"], roles=roles)
-    finally:
-        conn.close()
+def require_roles_dependency(required: set[str]) -> Callable[..., AuthUser]:
+    """Return the dependency admitting users that hold any of ``required``.
 
+    Dependencies are shared per role set, so every router guarding with the same
+    roles uses one callable and FastAPI resolves it once per request.
+    """
+    key = frozenset(required)
+    cached = _role_dependencies.get(key)
+    if cached is not None:
+        return cached
 
-def require_roles_dependency(required: set[str]):
     def dependency(current_user: Annotated[AuthUser, Depends(get_current_user)]) -> AuthUser:
         try:
-            require_role(current_user.roles, required)
+            require_role(current_user.roles, key)
         except PermissionError as exc:
             raise HTTPException(status_code=403, detail="Forbidden") from exc
         return current_user
 
-    return dependency
+    return _role_dependencies.setdefault(key, dependency)
@@ -2,64 +2,69 @@
 
 from __future__ import annotations
 
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from api.problem import problem_response
-from security.settings import (
-    CSRF_HEADER_NAME,
-    csrf_cookie_name_candidates,
-    session_cookie_name_candidates,
-    trusted_origins,
-)
+from security.auth import csrf_token_from_request, session_token_from_request
+from security.settings import CSRF_HEADER_NAME, trusted_origins
 
-SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE"})
 
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    """Require CSRF token validation for state-changing browser requests."""
+class CSRFMiddleware:
+    """Require CSRF token validation for state-changing browser requests.
 
-    async def dispatch(self, request: Request, call_next):
-        if request.method in SAFE_METHODS:
-            return await call_next(request)
+    Plain ASGI rather than ``BaseHTTPMiddleware``: it only inspects request headers,
+    so passing requests go straight to the app without a task group or wrapped body.
+    """
 
-        # Only enforce CSRF when a browser session cookie is present.
-        session_cookie_present = any(
-            request.cookies.get(cookie_name) for cookie_name in session_cookie_name_candidates()
-        )
-        if not session_cookie_present:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        origin = request.headers.get("origin")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # Only enforce CSRF when a browser session cookie is present. Requests without
+        # a Cookie header skip cookie parsing altogether.
+        if "cookie" not in headers:
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if session_token_from_request(request) is None:
+            await self.app(scope, receive, send)
+            return
+
+        origin = headers.get("origin")
         if origin and origin not in trusted_origins():
-            return problem_response(
-                status=403,
-                title="Forbidden",
-                detail="Origin is not allowed for this session.",
-                type_="https://incident-workbench.dev/problems/csrf-origin",
-                instance=str(request.url.path),
-                request_id=getattr(request.state, "request_id", None),
-                trace_id=getattr(request.state, "trace_id", None),
+            await _forbidden(scope, "csrf-origin", "Origin is not allowed for this session.")(
+                scope, receive, send
             )
+            return
 
-        csrf_cookie = next(
-            (
-                request.cookies.get(cookie_name)
-                for cookie_name in csrf_cookie_name_candidates()
-                if request.cookies.get(cookie_name)
-            ),
-            None,
-        )
-        csrf_header = request.headers.get(CSRF_HEADER_NAME)
+        csrf_cookie = csrf_token_from_request(request)
+        csrf_header = headers.get(CSRF_HEADER_NAME)
         if not csrf_cookie or not csrf_header or csrf_cookie != csrf_header:
-            return problem_response(
-                status=403,
-                title="Forbidden",
-                detail="CSRF token missing or invalid.",
-                type_="https://incident-workbench.dev/problems/csrf-token",
-                instance=str(request.url.path),
-                request_id=getattr(request.state, "request_id", None),
-                trace_id=getattr(request.state, "trace_id", None),
+            await _forbidden(scope, "csrf-token", "CSRF token missing or invalid.")(
+                scope, receive, send
             )
+            return
+
+        await self.app(scope, receive, send)
+
 
-        return await call_next(request)
+def _forbidden(scope: Scope, problem: str, detail: str) -> Response:
+    return problem_response(
+        status=403,
+        title="Forbidden",
+        detail=detail,
+        type_=f"https://incident-workbench.dev/problems/{problem}",
+        instance=scope["path"],
+        request_id=scope.get("request_id"),
+        trace_id=scope.get("trace_id"),
+    )
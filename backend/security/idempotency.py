@@ -2,131 +2,208 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import json
 import logging
-from collections.abc import AsyncIterator
-from typing import cast
+from collections import OrderedDict
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+import orjson
+from starlette.datastructures import Headers
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from api.problem import problem_response
 from database import db
 
 logger = logging.getLogger(__name__)
 
-WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
 MAX_STORED_RESPONSE_BYTES = 1_000_000
 
+IdempotencyRecord = tuple[str, int | None, str | None]
 
-class IdempotencyMiddleware(BaseHTTPMiddleware):
-    """Replay responses for matching `Idempotency-Key` + route + request body."""
+# A stored response is never overwritten, so completed records can be replayed from
+# memory without touching SQLite, even with several processes sharing the database.
+# Only small bodies are kept, which bounds the cache at a few megabytes. It is only
+# touched from the event loop, never from the worker threads doing the SQLite work.
+_REPLAY_CACHE_MAX_ENTRIES = 1_000
+_REPLAY_CACHE_MAX_BODY_BYTES = 16_384
+_completed_records: OrderedDict[tuple[str, str], IdempotencyRecord] = OrderedDict()
 
-    async def dispatch(self, request: Request, call_next):
-        if request.method not in WRITE_METHODS:
-            return await call_next(request)
 
-        idempotency_key = request.headers.get("Idempotency-Key")
-        if not idempotency_key:
-            return await call_next(request)
+def _cached_record(key: tuple[str, str]) -> IdempotencyRecord | None:
+    record = _completed_records.get(key)
+    if record is not None:
+        _completed_records.move_to_end(key)
+    return record
+
+
+def _remember_record(key: tuple[str, str], record: IdempotencyRecord) -> None:
+    response_body = record[2]
+    if response_body is None or len(response_body) > _REPLAY_CACHE_MAX_BODY_BYTES:
+        return
+    _completed_records[key] = record
+    _completed_records.move_to_end(key)
+    if len(_completed_records) > _REPLAY_CACHE_MAX_ENTRIES:
+        _completed_records.popitem(last=False)
+
 
-        body = await request.body()
-        request_hash = hashlib.sha256(body).hexdigest()
-        route = request.url.path
+class IdempotencyMiddleware:
+    """Replay responses for matching `Idempotency-Key` + route + request body.
 
-        existing = self._get_existing_record(idempotency_key, route)
+    Plain ASGI: the request body is read straight from ``receive`` and replayed to
+    the app, and the response streams through ``send`` while a copy of a JSON body
+    is kept for storage.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = Headers(scope=scope).get("Idempotency-Key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        # Hash the body as it arrives and keep the received messages to replay to the
+        # app as they came, so the body is never joined into one copy.
+        hasher = hashlib.sha256()
+        body_messages: list[Message] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            hasher.update(message.get("body", b""))
+            body_messages.append(message)
+            if not message.get("more_body", False):
+                break
+        request_hash = hasher.hexdigest()
+        route = scope["path"]
+
+        existing = _cached_record((idempotency_key, route))
+        if existing is None:
+            # SQLite work runs in a worker thread (asyncio.to_thread) so waiting for
+            # the writer lock, e.g. behind an ingest batch, does not stall the loop.
+            existing = await asyncio.to_thread(
+                self._reserve_or_fetch, idempotency_key, route, request_hash
+            )
+            if existing is not None and existing[1] is not None:
+                _remember_record((idempotency_key, route), existing)
         if existing is not None:
             replay_or_error = self._replay_or_reject_existing(
-                request=request,
+                scope=scope,
                 route=route,
                 request_hash=request_hash,
                 existing=existing,
             )
             if replay_or_error is not None:
-                return replay_or_error
-        else:
-            created = self._create_pending_record(idempotency_key, route, request_hash)
-            if not created:
-                existing_after_race = self._get_existing_record(idempotency_key, route)
-                if existing_after_race is not None:
-                    replay_or_error = self._replay_or_reject_existing(
-                        request=request,
-                        route=route,
-                        request_hash=request_hash,
-                        existing=existing_after_race,
+                await replay_or_error(scope, receive, send)
+                return
+
+        pending_messages = iter(body_messages)
+
+        async def replay_receive() -> Message:
+            return next(pending_messages, None) or await receive()
+
+        response_code = 500
+        captured: bytearray | None = None
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal response_code, captured
+            if message["type"] == "http.response.start":
+                response_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type", "")
+                # Only JSON bodies from non-5xx responses are stored.
+                if response_code < 500 and content_type.startswith("application/json"):
+                    captured = bytearray()
+            elif message["type"] == "http.response.body" and captured is not None:
+                captured.extend(message.get("body", b""))
+                if len(captured) > MAX_STORED_RESPONSE_BYTES:
+                    logger.info(
+                        "Skipping idempotency response persistence because payload is too large"
                     )
-                    if replay_or_error is not None:
-                        return replay_or_error
-
-        async def receive():
-            return {"type": "http.request", "body": body, "more_body": False}
-
-        replayable_request = Request(request.scope, receive)
-        replayable_request.state.request_id = getattr(request.state, "request_id", None)
-        replayable_request.state.trace_id = getattr(request.state, "trace_id", None)
-
-        response = await call_next(replayable_request)
-        captured_response, response_json = await _capture_response_body(response)
-
-        if captured_response.status_code < 500 and response_json is not None:
-            self._store_response(
-                idempotency_key=idempotency_key,
-                route=route,
-                response_code=captured_response.status_code,
-                response_body=response_json,
+                    captured = None
+                elif not message.get("more_body", False):
+                    # Stored before the last chunk goes out, so a client retrying as
+                    # soon as it has the response finds it completed, not pending.
+                    response_json = _stored_json(captured)
+                    if response_json is not None:
+                        stored = await asyncio.to_thread(
+                            self._store_response,
+                            idempotency_key=idempotency_key,
+                            route=route,
+                            request_hash=request_hash,
+                            response_code=response_code,
+                            response_body=response_json,
+                        )
+                        if stored:
+                            _remember_record(
+                                (idempotency_key, route),
+                                (request_hash, response_code, response_json),
+                            )
+            await send(message)
+
+        await self.app(scope, replay_receive, send_and_capture)
+
+    def _reserve_or_fetch(
+        self, key: str, route: str, request_hash: str
+    ) -> IdempotencyRecord | None:
+        """Reserve the key for this request, or return the row another request holds.
+
+        Both statements run under the writer lock, so a concurrent request for the
+        same key cannot slip in between the reservation attempt and the lookup.
+        """
+        with db.get_writer() as conn:
+            cursor = conn.execute(
+                "INSERT INTO idempotency_keys (key, route, request_hash) VALUES (?, ?, ?) "
+                "ON CONFLICT (key, route) DO NOTHING",
+                (key, route, request_hash),
             )
-
-        return captured_response
-
-    def _get_existing_record(
-        self, key: str, route: str
-    ) -> tuple[str, int | None, str | None] | None:
-        conn = db.get_connection()
-        try:
+            if cursor.rowcount > 0:
+                return None
             row = conn.execute(
                 "SELECT request_hash, response_code, response_body FROM idempotency_keys WHERE key = ? AND route = ?",
                 (key, route),
             ).fetchone()
-            if row is None:
-                return None
-            return row["request_hash"], row["response_code"], row["response_body"]
-        finally:
-            conn.close()
-
-    def _create_pending_record(self, key: str, route: str, request_hash: str) -> bool:
-        conn = db.get_connection()
-        try:
-            cursor = conn.execute(
-                "INSERT OR IGNORE INTO idempotency_keys (key, route, request_hash) VALUES (?, ?, ?)",
-                (key, route, request_hash),
-            )
-            conn.commit()
-            return cursor.rowcount > 0
-        finally:
-            conn.close()
+        return row["request_hash"], row["response_code"], row["response_body"]
 
     def _store_response(
-        self, *, idempotency_key: str, route: str, response_code: int, response_body: str
-    ) -> None:
-        conn = db.get_connection()
-        try:
-            conn.execute(
-                "UPDATE idempotency_keys SET response_code = ?, response_body = ? WHERE key = ? AND route = ?",
-                (response_code, response_body, idempotency_key, route),
+        self,
+        *,
+        idempotency_key: str,
+        route: str,
+        request_hash: str,
+        response_code: int,
+        response_body: str,
+    ) -> bool:
+        """Store the response; returns False when the row already held one."""
+        # Upsert so the response is kept even if the reservation was cleared meanwhile;
+        # a row that already holds a response is never overwritten.
+        with db.get_writer() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO idempotency_keys (key, route, request_hash, response_code, response_body)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key, route) DO UPDATE SET
+                    response_code = excluded.response_code,
+                    response_body = excluded.response_body
+                WHERE idempotency_keys.response_code IS NULL
+                """,
+                (idempotency_key, route, request_hash, response_code, response_body),
             )
-            conn.commit()
-        finally:
-            conn.close()
+        return cursor.rowcount > 0
 
     def _replay_or_reject_existing(
         self,
         *,
-        request: Request,
+        scope: Scope,
         route: str,
         request_hash: str,
-        existing: tuple[str, int | None, str | None],
+        existing: IdempotencyRecord,
     ) -> Response | None:
         existing_hash, response_code, response_body = existing
 
@@ -137,8 +214,8 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
                 detail="Idempotency-Key was reused with a different request payload.",
                 type_="https://incident-workbench.dev/problems/idempotency-conflict",
                 instance=route,
-                request_id=getattr(request.state, "request_id", None),
-                trace_id=getattr(request.state, "trace_id", None),
+                request_id=scope.get("request_id"),
+                trace_id=scope.get("trace_id"),
             )
 
         if response_code is None:
@@ -148,20 +225,16 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
                 detail="A request with the same Idempotency-Key is still processing.",
                 type_="https://incident-workbench.dev/problems/idempotency-in-progress",
                 instance=route,
-                request_id=getattr(request.state, "request_id", None),
-                trace_id=getattr(request.state, "trace_id", None),
+                request_id=scope.get("request_id"),
+                trace_id=scope.get("trace_id"),
             )
 
         if response_body is None:
             return None
 
-        try:
-            content = json.loads(response_body)
-        except json.JSONDecodeError:
-            content = {"detail": "Stored idempotent response was not valid JSON."}
-
+        # Bodies are validated as JSON before they are stored, so they replay verbatim.
         replay = Response(
-            content=json.dumps(content),
+            content=response_body,
             status_code=response_code,
             media_type="application/json",
         )
@@ -169,35 +242,10 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
         return replay
 
 
-async def _capture_response_body(response: Response) -> tuple[Response, str | None]:
-    body = b""
-    body_iterator = getattr(response, "body_iterator", None)
-    if body_iterator is not None:
-        chunks = []
-        async for chunk in cast(AsyncIterator[bytes], body_iterator):
-            chunks.append(chunk)
-        body = b"".join(chunks)
-    else:
-        body = getattr(response, "body", b"")
-
-    rebuilt = Response(
-        content=body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=response.media_type,
-        background=response.background,
-    )
-
-    if len(body) > MAX_STORED_RESPONSE_BYTES:
-        logger.info("Skipping idempotency response persistence because payload is too large")
-        return rebuilt, None
-
-    if not response.headers.get("content-type", "").startswith("application/json"):
-        return rebuilt, None
-
+def _stored_json(body: bytearray) -> str | None:
+    """Return a captured body as text if it is valid JSON, else None."""
     try:
-        parsed = json.loads(body.decode("utf-8"))
-    except Exception:
-        return rebuilt, None
-
-    return rebuilt, json.dumps(parsed)
+        orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    return body.decode("utf-8")
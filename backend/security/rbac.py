@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 
-def require_role(user_roles: set[str], required: set[str]) -> None:
+def require_role(user_roles: set[str], required: frozenset[str] | set[str]) -> None:
     """Raise if the user does not hold any required role."""
-    if not required.intersection(user_roles):
+    if required.isdisjoint(user_roles):
         raise PermissionError("forbidden")
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from typing import Literal
 
 SESSION_COOKIE_NAME = "__Host-session"
@@ -16,19 +17,25 @@ CSRF_COOKIE_NAME = "__Host-csrf"
 INSECURE_CSRF_COOKIE_NAME = "workbench-csrf"
 CSRF_HEADER_NAME = "X-CSRF-Token"
 
+# Accepted cookie names, secure name first; built once instead of per request.
+SESSION_COOKIE_NAMES = (SESSION_COOKIE_NAME, INSECURE_SESSION_COOKIE_NAME)
+CSRF_COOKIE_NAMES = (CSRF_COOKIE_NAME, INSECURE_CSRF_COOKIE_NAME)
+
 DEFAULT_TRUSTED_ORIGINS = {
     "http://localhost:1420",
     "tauri://localhost",
 }
 
 
-def trusted_origins() -> set[str]:
+@lru_cache(maxsize=1)
+def trusted_origins() -> frozenset[str]:
     raw = os.getenv("WORKBENCH_TRUSTED_ORIGINS")
     if not raw:
-        return set(DEFAULT_TRUSTED_ORIGINS)
-    return {origin.strip() for origin in raw.split(",") if origin.strip()}
+        return frozenset(DEFAULT_TRUSTED_ORIGINS)
+    return frozenset(origin.strip() for origin in raw.split(",") if origin.strip())
 
 
+@lru_cache(maxsize=None)
 def cookie_secure_for_scheme(request_scheme: str) -> bool:
     """Use secure cookies on HTTPS and allow local HTTP test flows."""
     override = os.getenv("WORKBENCH_SESSION_COOKIE_SECURE")
@@ -37,6 +44,7 @@ def cookie_secure_for_scheme(request_scheme: str) -> bool:
     return SESSION_COOKIE_SECURE and request_scheme.lower() == "https"
 
 
+@lru_cache(maxsize=None)
 def active_cookie_names(request_scheme: str) -> tuple[str, str]:
     """Select cookie names compatible with the current scheme."""
     if cookie_secure_for_scheme(request_scheme):
@@ -46,9 +54,20 @@ def active_cookie_names(request_scheme: str) -> tuple[str, str]:
 
 def session_cookie_name_candidates() -> tuple[str, str]:
     """Cookie names accepted for session auth lookup."""
-    return SESSION_COOKIE_NAME, INSECURE_SESSION_COOKIE_NAME
+    return SESSION_COOKIE_NAMES
 
 
 def csrf_cookie_name_candidates() -> tuple[str, str]:
     """Cookie names accepted for CSRF lookup."""
-    return CSRF_COOKIE_NAME, INSECURE_CSRF_COOKIE_NAME
+    return CSRF_COOKIE_NAMES
+
+
+def reload_security_settings() -> None:
+    """Re-read the environment-derived values above on their next use.
+
+    They are cached for the life of the process, like ``get_settings()``; call this
+    after changing ``WORKBENCH_TRUSTED_ORIGINS`` or ``WORKBENCH_SESSION_COOKIE_SECURE``.
+    """
+    trusted_origins.cache_clear()
+    cookie_secure_for_scheme.cache_clear()
+    active_cookie_names.cache_clear()
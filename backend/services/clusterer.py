@@ -2,18 +2,35 @@
 
 import json
 import sqlite3
+from datetime import datetime
 from uuid import uuid4
 
 import numpy as np
-from sklearn.cluster import AgglomerativeClustering
-from sklearn.metrics import silhouette_score
 
 from exceptions import ClusteringError, InsufficientDataError
 from models.cluster import ClusterResult, ClusterRunResult
+from observability.context import request_now
+
+
+def _sklearn():
+    """Import scikit-learn on first clustering run.
+
+    It dominates backend import time, and most processes (tests, OpenAPI export,
+    read-only API traffic) never cluster.
+    """
+    from sklearn.cluster import AgglomerativeClustering
+    from sklearn.metrics import silhouette_score
+
+    return AgglomerativeClustering, silhouette_score
 
 
 class IncidentClusterer:
-    """Service for clustering incidents based on embeddings."""
+    """Service for clustering incidents based on embeddings.
+
+    Result models are built with ``model_construct``: every field comes from the
+    clustering output or our own tables, so pydantic validation would only re-check
+    values we produced.
+    """
 
     def __init__(self, db_conn: sqlite3.Connection) -> None:
         self.db = db_conn
@@ -116,6 +133,7 @@ class IncidentClusterer:
         self, matrix: np.ndarray, n_clusters: int, linkage: str, metric: str
     ) -> tuple[np.ndarray, float | None]:
         """Cluster with fixed k."""
+        AgglomerativeClustering, silhouette_score = _sklearn()
         model = AgglomerativeClustering(
             n_clusters=n_clusters,
             linkage=linkage,
@@ -134,6 +152,7 @@ class IncidentClusterer:
         self, matrix: np.ndarray, min_k: int, max_k: int, linkage: str, metric: str
     ) -> tuple[np.ndarray, int, float]:
         """Auto-determine k via silhouette score."""
+        AgglomerativeClustering, silhouette_score = _sklearn()
         best_score = -1.0
         best_labels = None
         best_k = min_k
@@ -248,7 +267,7 @@ class IncidentClusterer:
         clusters = []
         for cluster_id, member_ids in clusters_map.items():
             clusters.append(
-                ClusterResult(
+                ClusterResult.model_construct(
                     cluster_id=cluster_id,
                     incident_ids=member_ids,
                     size=len(member_ids),
@@ -257,7 +276,7 @@ class IncidentClusterer:
                 )
             )
 
-        return ClusterRunResult(
+        return ClusterRunResult.model_construct(
             run_id=run_id,
             n_clusters=n_clusters,
             method="agglomerative",
@@ -268,6 +287,7 @@ class IncidentClusterer:
             },
             clusters=clusters,
             noise_incident_ids=[],
+            created_at=request_now(),
         )
 
     def get_run(self, run_id: str) -> ClusterRunResult | None:
@@ -317,7 +337,7 @@ class IncidentClusterer:
             member_ids = [r["incident_id"] for r in member_rows]
 
             clusters.append(
-                ClusterResult(
+                ClusterResult.model_construct(
                     cluster_id=cluster_row["cluster_label"],
                     incident_ids=member_ids,
                     size=len(member_ids),
@@ -326,14 +346,14 @@ class IncidentClusterer:
                 )
             )
 
-        return ClusterRunResult(
+        return ClusterRunResult.model_construct(
             run_id=run_id,
             n_clusters=run_row["n_clusters"],
             method=run_row["method"],
             parameters=params,
             clusters=clusters,
             noise_incident_ids=[],
-            created_at=run_row["created_at"],
+            created_at=datetime.fromisoformat(run_row["created_at"]),
         )
 
     def list_runs(self) -> list[ClusterRunResult]:
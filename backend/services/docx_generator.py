@@ -1,6 +1,7 @@
 """Word document report generator."""
 
 import base64
+import logging
 from io import BytesIO
 
 from docx import Document
@@ -10,6 +11,8 @@ from docx.shared import Inches
 from models.cluster import ClusterResult
 from models.report import ReportResult
 
+logger = logging.getLogger(__name__)
+
 
 class DocxGenerator:
     """Service for generating Word document reports."""
@@ -103,9 +106,7 @@ class DocxGenerator:
                     image_bytes = base64.b64decode(b64_png)
                     doc.add_picture(BytesIO(image_bytes), width=Inches(6.0))
                 except Exception as e:
-                    import logging
-
-                    logging.error(f"Failed to embed chart '{chart_name}': {e}")
+                    logger.error(f"Failed to embed chart '{chart_name}': {e}")
                     # Add visible warning in document
                     warning_para = doc.add_paragraph(f"[Chart image failed to embed: {e}]")
                     warning_para.style = "Intense Quote"
@@ -0,0 +1,196 @@
+"""Batched incident upserts shared by the ingest endpoints."""
+
+import asyncio
+import logging
+import sqlite3
+
+import orjson
+
+from config import get_settings
+from database import db
+from models.incident import Incident
+
+logger = logging.getLogger(__name__)
+
+IncidentRow = tuple[object, ...]
+WriteCounts = tuple[int, int]
+
+# Re-ingesting an unchanged incident matches the WHERE clause's row-value IS NOT
+# and skips the update, so repeated syncs of the same JQL or channel write no pages.
+UPSERT_INCIDENT_SQL = """
+    INSERT INTO incidents (
+        external_id, source, severity, title, description,
+        occurred_at, resolved_at, raw_data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(external_id, source) DO UPDATE SET
+        severity = excluded.severity,
+        title = excluded.title,
+        description = excluded.description,
+        resolved_at = excluded.resolved_at,
+        raw_data = excluded.raw_data
+    WHERE (
+        incidents.severity, incidents.title, incidents.description,
+        incidents.resolved_at, incidents.raw_data
+    ) IS NOT (
+        excluded.severity, excluded.title, excluded.description,
+        excluded.resolved_at, excluded.raw_data
+    )
+"""
+
+# Keys of a batch that already exist, looked up in one statement through the
+# unique (external_id, source) index. The batch keys arrive as a JSON array of pairs.
+EXISTING_KEYS_SQL = """
+    SELECT i.external_id, i.source
+    FROM json_each(?) AS k
+    JOIN incidents AS i
+      ON i.external_id = json_extract(k.value, '$[0]')
+     AND i.source = json_extract(k.value, '$[1]')
+"""
+
+
+def incident_row(incident: Incident) -> IncidentRow:
+    """Flatten an incident into upsert parameters; (external_id, source) lead."""
+    return (
+        incident.external_id,
+        incident.source.value,
+        incident.severity.value,
+        incident.title,
+        incident.description,
+        incident.occurred_at.isoformat(),
+        incident.resolved_at.isoformat() if incident.resolved_at else None,
+        orjson.dumps(incident.raw_data).decode(),
+    )
+
+
+def store_incident_batches(
+    conn: sqlite3.Connection, batches: list[list[IncidentRow]]
+) -> list[WriteCounts]:
+    """Upsert several batches of flattened rows in one transaction, in order.
+
+    Returns (inserted, updated) counts per batch. A key repeated within or across
+    batches counts as an update after its first occurrence, as it would with
+    row-by-row upserts.
+    """
+    rows = [row for batch in batches for row in batch]
+    if not rows:
+        return [(0, 0)] * len(batches)
+
+    keys = [row[:2] for row in rows]
+    conn.execute("BEGIN IMMEDIATE")
+    seen = {tuple(row) for row in conn.execute(EXISTING_KEYS_SQL, (orjson.dumps(keys).decode(),))}
+    conn.executemany(UPSERT_INCIDENT_SQL, rows)
+
+    counts = []
+    for batch in batches:
+        inserted = 0
+        for row in batch:
+            key = row[:2]
+            if key not in seen:
+                inserted += 1
+                seen.add(key)
+        counts.append((inserted, len(batch) - inserted))
+    return counts
+
+
+def store_incidents(conn: sqlite3.Connection, rows: list[IncidentRow]) -> WriteCounts:
+    """Upsert one batch of flattened rows; returns (inserted, updated)."""
+    return store_incident_batches(conn, [rows])[0]
+
+
+def write_incident_batches(batches: list[list[IncidentRow]]) -> list[WriteCounts]:
+    # Runs in a worker thread (asyncio.to_thread): the write transaction, and any wait
+    # for the writer lock, stays off the event loop.
+    with db.get_writer() as conn:
+        return store_incident_batches(conn, batches)
+
+
+class IncidentWriteQueue:
+    """Coalesce concurrent ingest writes into shared transactions.
+
+    While one write transaction runs, batches submitted by other requests queue up
+    and are flushed together in the next one (up to ``max_rows``), so a burst of
+    small ingests pays for one BEGIN/COMMIT instead of one each. An idle queue
+    flushes immediately rather than waiting for more rows.
+
+    Before ``start()`` (e.g. when the app lifespan has not run), ``submit`` writes
+    the batch directly. Without an explicit ``max_rows`` the limit is read from
+    settings when the queue starts.
+    """
+
+    def __init__(self, max_rows: int | None = None) -> None:
+        self.max_rows = max_rows
+        self._pending: asyncio.Queue[tuple[list[IncidentRow], asyncio.Future[WriteCounts]]]
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        # The queue is created here so it belongs to the running event loop.
+        self._pending = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="incident-write-queue")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._pending.empty():
+            _, future = self._pending.get_nowait()
+            _set_exception(future, RuntimeError("Incident write queue stopped"))
+
+    async def submit(self, rows: list[IncidentRow]) -> WriteCounts:
+        """Upsert ``rows`` and return their (inserted, updated) counts."""
+        if not rows:
+            return 0, 0
+        if self._task is None:
+            return (await asyncio.to_thread(write_incident_batches, [rows]))[0]
+
+        future: asyncio.Future[WriteCounts] = asyncio.get_running_loop().create_future()
+        self._pending.put_nowait((rows, future))
+        return await future
+
+    async def _run(self) -> None:
+        max_rows = self.max_rows or get_settings().ingest_write_max_rows
+        while True:
+            group = [await self._pending.get()]
+            queued_rows = len(group[0][0])
+            while queued_rows < max_rows and not self._pending.empty():
+                item = self._pending.get_nowait()
+                group.append(item)
+                queued_rows += len(item[0])
+            try:
+                await self._flush(group)
+            except asyncio.CancelledError:
+                for _, future in group:
+                    future.cancel()
+                raise
+
+    async def _flush(
+        self, group: list[tuple[list[IncidentRow], asyncio.Future[WriteCounts]]]
+    ) -> None:
+        try:
+            counts = await asyncio.to_thread(write_incident_batches, [rows for rows, _ in group])
+        except Exception as exc:
+            if len(group) == 1:
+                _set_exception(group[0][1], exc)
+                return
+            # One bad batch rolls back the shared transaction; retry each on its own
+            # so the others still land.
+            logger.warning("coalesced incident write failed, retrying batches individually")
+            for item in group:
+                await self._flush([item])
+            return
+
+        for (_, future), batch_counts in zip(group, counts):
+            if not future.done():
+                future.set_result(batch_counts)
+
+
+def _set_exception(future: asyncio.Future[WriteCounts], exc: Exception) -> None:
+    if not future.done():
+        future.set_exception(exc)
+
+
+incident_write_queue = IncidentWriteQueue()
@@ -2,18 +2,25 @@
 
 import httpx
 
-from clients.http import new_async_client, request_with_retries
+from clients.http import borrow_client, request_with_retries
 from exceptions import JiraConnectionError, JiraQueryError
 
 
 class JiraClient:
     """Client for Jira API integration."""
 
-    def __init__(self, url: str, email: str, api_token: str) -> None:
+    def __init__(
+        self,
+        url: str,
+        email: str,
+        api_token: str,
+        http_client: httpx.AsyncClient | None = None,
+    ) -> None:
         self.url = url.rstrip("/")
         self.email = email
         self.api_token = api_token
         self.auth = (email, api_token)
+        self.http_client = http_client
 
     async def test_connection(self) -> dict:
         """Test connection to Jira instance.
@@ -22,12 +29,13 @@ class JiraClient:
             Dict with server info (title and version)
         """
         try:
-            async with new_async_client(timeout=httpx.Timeout(10.0)) as client:
+            async with borrow_client(self.http_client) as client:
                 response = await request_with_retries(
                     client,
                     "GET",
                     f"{self.url}/rest/api/2/serverInfo",
                     auth=self.auth,
+                    timeout=httpx.Timeout(10.0),
                     max_attempts=2,
                 )
 
@@ -88,7 +96,7 @@ class JiraClient:
         batch_size = 50  # Jira's recommended page size
 
         try:
-            async with new_async_client(timeout=httpx.Timeout(30.0)) as client:
+            async with borrow_client(self.http_client) as client:
                 while True:
                     response = await request_with_retries(
                         client,
@@ -101,6 +109,7 @@ class JiraClient:
                             "fields": "summary,description,status,priority,assignee,created,resolutiondate,labels,project",
                         },
                         auth=self.auth,
+                        timeout=httpx.Timeout(30.0),
                         max_attempts=3,
                     )
 
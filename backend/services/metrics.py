@@ -82,7 +82,7 @@ class MetricsCalculator:
         by_assignee = self._count_by(rows, "assignee", top_n=10)
         by_project = self._count_by(rows, "jira_project")
 
-        return MetricsResult(
+        return MetricsResult.model_construct(
             total_incidents=total,
             sev1_count=by_severity.get("SEV1", 0),
             sev2_count=by_severity.get("SEV2", 0),
@@ -1,10 +1,13 @@
 """Incident data normalization from external sources."""
 
+import logging
 import re
 from datetime import datetime
 
 from models.incident import Incident, IncidentSource, Severity
 
+logger = logging.getLogger(__name__)
+
 
 class IncidentNormalizer:
     """Normalize incidents from Jira and Slack to common format."""
@@ -142,9 +145,7 @@ class IncidentNormalizer:
         Handles formats like: "2024-01-15T10:30:00.000+0000"
         """
         if not ts_str:
-            import logging
-
-            logging.warning(
+            logger.warning(
                 "Empty timestamp string received from Jira, using current time as fallback"
             )
             return datetime.utcnow()
@@ -155,9 +156,7 @@ class IncidentNormalizer:
             clean_ts = re.sub(r"\.\d{3}[+-]\d{4}$", "", ts_str)
             return datetime.fromisoformat(clean_ts)
         except (ValueError, AttributeError) as e:
-            import logging
-
-            logging.error(
+            logger.error(
                 f"Failed to parse Jira timestamp '{ts_str}': {e}. Using current time as fallback."
             )
             return datetime.utcnow()
@@ -172,9 +171,7 @@ class IncidentNormalizer:
             epoch = float(ts)
             return datetime.fromtimestamp(epoch)
         except (ValueError, TypeError) as e:
-            import logging
-
-            logging.error(
+            logger.error(
                 f"Failed to parse Slack timestamp '{ts}': {e}. Using current time as fallback."
             )
             return datetime.utcnow()
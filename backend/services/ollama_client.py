@@ -1,18 +1,27 @@
 """Ollama integration client."""
 
+from typing import Annotated
+
 import httpx
+from fastapi import Depends, Request
 
-from clients.http import new_async_client, request_with_retries
-from config import settings
+from clients.http import HttpClient, new_async_client, request_with_retries
+from config import get_settings
 from exceptions import OllamaModelNotFoundError, OllamaUnavailableError
 
+OLLAMA_TIMEOUT = httpx.Timeout(120.0, connect=2.0, pool=2.0)
+
 
 class OllamaClient:
     """Client for Ollama local LLM integration."""
 
-    def __init__(self, base_url: str | None = None) -> None:
-        self.base_url = (base_url or settings.ollama_url).rstrip("/")
-        self.client = new_async_client(timeout=httpx.Timeout(120.0, connect=2.0, pool=2.0))
+    def __init__(
+        self, base_url: str | None = None, http_client: httpx.AsyncClient | None = None
+    ) -> None:
+        self.base_url = (base_url or get_settings().ollama_url).rstrip("/")
+        # A shared client is borrowed, not owned: close() leaves it open.
+        self._owns_client = http_client is None
+        self.client = http_client or new_async_client(timeout=OLLAMA_TIMEOUT)
 
     async def embed_batch(
         self, texts: list[str], model: str = "nomic-embed-text"
@@ -24,6 +33,7 @@ class OllamaClient:
                 "POST",
                 f"{self.base_url}/api/embed",
                 json={"model": model, "input": texts},
+                timeout=OLLAMA_TIMEOUT,
                 max_attempts=2,
             )
             resp.raise_for_status()
@@ -112,8 +122,9 @@ class OllamaClient:
             return []
 
     async def close(self) -> None:
-        """Close HTTP client."""
-        await self.client.aclose()
+        """Close HTTP client if this instance created it."""
+        if self._owns_client:
+            await self.client.aclose()
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -122,3 +133,18 @@ class OllamaClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
         await self.close()
+
+
+async def get_ollama(request: Request, http_client: HttpClient) -> OllamaClient:
+    """Dependency returning the app-scoped Ollama client created in the lifespan.
+
+    Falls back to a client borrowing the request's HTTP client when the lifespan
+    has not run.
+    """
+    ollama = getattr(request.app.state, "ollama", None)
+    if ollama is not None:
+        return ollama
+    return OllamaClient(http_client=http_client)
+
+
+Ollama = Annotated[OllamaClient, Depends(get_ollama)]
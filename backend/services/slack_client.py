@@ -1,12 +1,12 @@
 """Slack integration client."""
 
 import asyncio
-import json
 from typing import Callable
 
 import httpx
+import orjson
 
-from clients.http import new_async_client, request_with_retries
+from clients.http import borrow_client, request_with_retries
 from exceptions import SlackAPIError, SlackRateLimitError
 
 
@@ -16,10 +16,16 @@ class SlackClient:
     RATE_LIMIT_DELAY = 61  # seconds between requests
     MAX_ITEMS_PER_REQUEST = 15
 
-    def __init__(self, bot_token: str, user_token: str | None = None) -> None:
+    def __init__(
+        self,
+        bot_token: str,
+        user_token: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ) -> None:
         self.bot_token = bot_token
         self.user_token = user_token
         self.base_url = "https://slack.com/api"
+        self.http_client = http_client
 
     async def test_connection(self) -> dict:
         """Test connection to Slack with bot token.
@@ -28,12 +34,13 @@ class SlackClient:
             Dict with team and user info
         """
         try:
-            async with new_async_client(timeout=httpx.Timeout(10.0)) as client:
+            async with borrow_client(self.http_client) as client:
                 response = await request_with_retries(
                     client,
                     "POST",
                     f"{self.base_url}/auth.test",
                     headers={"Authorization": f"Bearer {self.bot_token}"},
+                    timeout=httpx.Timeout(10.0),
                     max_attempts=2,
                 )
 
@@ -104,14 +111,14 @@ class SlackClient:
             progress_callback: Optional callback(fetched_count, total, delay_seconds)
 
         Returns:
-            List of message dicts
+            List of message dicts, oldest first
         """
         messages = []
         cursor = None
         fetched_count = 0
 
         try:
-            async with new_async_client(timeout=httpx.Timeout(30.0)) as client:
+            async with borrow_client(self.http_client) as client:
                 while True:
                     params = {
                         "channel": channel_id,
@@ -128,6 +135,7 @@ class SlackClient:
                         f"{self.base_url}/conversations.history",
                         params=params,
                         headers={"Authorization": f"Bearer {self.bot_token}"},
+                        timeout=httpx.Timeout(30.0),
                         max_attempts=3,
                     )
 
@@ -156,6 +164,9 @@ class SlackClient:
                     # Rate limit delay between requests
                     await asyncio.sleep(self.RATE_LIMIT_DELAY)
 
+            # conversations.history pages run newest first; one reverse here leaves
+            # every thread grouped from this list already in chronological order.
+            messages.reverse()
             return messages
 
         except (SlackAPIError, SlackRateLimitError):
@@ -180,7 +191,7 @@ class SlackClient:
         await asyncio.sleep(self.RATE_LIMIT_DELAY)
 
         try:
-            async with new_async_client(timeout=httpx.Timeout(30.0)) as client:
+            async with borrow_client(self.http_client) as client:
                 # User token required for thread replies
                 token = self.user_token or self.bot_token
 
@@ -193,6 +204,7 @@ class SlackClient:
                         "ts": thread_ts,
                     },
                     headers={"Authorization": f"Bearer {token}"},
+                    timeout=httpx.Timeout(30.0),
                     max_attempts=3,
                 )
 
@@ -216,36 +228,52 @@ class SlackClient:
             )
 
     @staticmethod
-    def parse_export(export_json: str | list | dict) -> list[dict]:
+    def _normalize_timestamps(messages: list[dict]) -> None:
+        """Coerce numeric ts/thread_ts values to strings, in place.
+
+        The Slack API always returns timestamps as strings, but hand-edited or
+        converted exports sometimes carry numbers. Normalizing here lets the ingest
+        grouping and sorting treat every ts as a string.
+        """
+        for msg in messages:
+            if not isinstance(msg, dict):
+                continue
+            for key in ("ts", "thread_ts"):
+                value = msg.get(key)
+                if value is not None and not isinstance(value, str):
+                    msg[key] = str(value)
+
+    @staticmethod
+    def parse_export(export_json: str | bytes | list | dict) -> list[dict]:
         """Parse Slack workspace export JSON.
 
         Args:
-            export_json: JSON string or parsed dict/list from Slack export
+            export_json: JSON text (str or UTF-8 bytes) or parsed dict/list from Slack export
 
         Returns:
             Flat list of message dicts
         """
         try:
-            # Handle string input
-            if isinstance(export_json, str):
-                data = json.loads(export_json)
+            # Handle raw JSON input; orjson decodes bytes without an intermediate str
+            if isinstance(export_json, (str, bytes)):
+                data = orjson.loads(export_json)
             else:
                 data = export_json
 
             # Handle list format (array of messages)
             if isinstance(data, list):
-                return data
-
+                messages = data
             # Handle dict format (object with messages array)
-            if isinstance(data, dict):
-                if "messages" in data:
-                    return data["messages"]
+            elif isinstance(data, dict):
                 # If dict doesn't have messages key, assume it's a single message
-                return [data]
+                messages = data["messages"] if "messages" in data else [data]
+            else:
+                return []
 
-            return []
+            SlackClient._normalize_timestamps(messages)
+            return messages
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise SlackAPIError(
                 "Invalid JSON format in export.",
                 details={"error": str(e)},
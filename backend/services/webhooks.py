@@ -2,34 +2,35 @@
 
 from __future__ import annotations
 
-import hashlib
 import hmac
-import json
 import os
 from typing import Any
 
-from config import settings
+import orjson
+
+from config import get_settings
 
 
 def secret_for_provider(provider: str) -> str:
     env_key = f"WORKBENCH_WEBHOOK_SECRET_{provider.upper()}"
-    return os.getenv(env_key, os.getenv("WORKBENCH_WEBHOOK_SECRET", settings.webhook_secret))
+    return os.getenv(env_key, os.getenv("WORKBENCH_WEBHOOK_SECRET", get_settings().webhook_secret))
+
 
+def new_signature_mac(provider: str) -> hmac.HMAC:
+    """HMAC-SHA256 keyed with the provider secret, for hashing a body as it streams in."""
+    return hmac.new(secret_for_provider(provider).encode("utf-8"), digestmod="sha256")
 
-def verify_signature(*, provider: str, body: bytes, signature: str) -> bool:
-    secret = secret_for_provider(provider)
-    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
 
+def signature_matches(mac: hmac.HMAC, signature: str) -> bool:
+    """Check a streamed body's HMAC against the signature header."""
     candidate = signature.strip()
     if candidate.startswith("sha256="):
         candidate = candidate.split("=", maxsplit=1)[1]
-
-    return hmac.compare_digest(candidate, expected)
+    return hmac.compare_digest(candidate, mac.hexdigest())
 
 
-def normalize_payload(body: bytes) -> dict[str, Any]:
-    decoded = body.decode("utf-8")
-    parsed = json.loads(decoded)
+def normalize_payload(body: bytes | bytearray) -> dict[str, Any]:
+    parsed = orjson.loads(body)
     if isinstance(parsed, dict):
         return parsed
     return {"data": parsed}
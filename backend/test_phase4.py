@@ -244,6 +244,15 @@ def test_report_generation_falls_back_without_ollama(monkeypatch):
     report = next((r for r in reports.json() if r["report_id"] == report_id), None)
     assert report is not None
     assert "generated without Ollama" in report["executive_summary"]
+    assert "Top cluster: Fallback cluster (1 incidents)." in report["executive_summary"]
+
+    download = client.get(f"/reports/{report_id}/download")
+    assert download.status_code == 200
+    etag = download.headers["etag"]
+    revalidated = client.get(f"/reports/{report_id}/download", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert revalidated.content == b""
 
     cleanup_conn = db.get_connection()
     try:
@@ -6,14 +6,51 @@ Tests for:
 - Edge case handling
 """
 
+import asyncio
 import hashlib
+import hmac
+import io
+import json
+import logging
+import os
 import sqlite3
+import subprocess
+import sys
+from datetime import UTC, datetime
+import httpx
 import pytest
 from pathlib import Path
+from uuid import uuid4
 from fastapi.testclient import TestClient
 
-from database import Database, db
-from main import app
+from api.problem import problem_document
+from clients.http import new_async_client
+from api.versioning import LegacyPathMiddleware, client_path
+from config import get_settings
+from database import Database, _split_sql_statements, db
+from exceptions import ClusteringError, JiraQueryError, SlackRateLimitError
+import main as main_module
+from main import _status_for_workbench_error, app
+from models.incident import Incident, IncidentSource, Severity
+from models.report import MetricsResult
+from observability.context import set_request_id, set_request_now
+from observability.logging import CorrelationFilter, JsonLogFormatter
+from routers import webhooks as webhooks_router
+from security import idempotency
+from security.auth import (
+    LastSeenFlusher,
+    _encode_password_hash,
+    authenticate_credentials,
+    password_needs_rehash,
+    require_roles_dependency,
+    verify_password,
+)
+from security.settings import (
+    reload_security_settings,
+    session_cookie_name_candidates,
+    trusted_origins,
+)
+from services.clusterer import IncidentClusterer
 from test_helpers import login_admin
 
 pytestmark = pytest.mark.integration
@@ -44,6 +81,170 @@ def test_foreign_keys_enabled(tmp_path: Path):
     assert fk_enabled == 1, "Foreign keys should be enabled"
 
 
+def test_connection_pragmas_applied(tmp_path: Path):
+    """Verify every connection gets the WAL-friendly performance pragmas."""
+    test_db = Database(db_path=tmp_path / "test.db")
+    first = test_db.get_connection()
+    second = test_db.get_connection()
+    try:
+        for conn in (first, second):
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64000
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        # WAL is persisted by the first connection, later ones inherit it.
+        assert second.execute("PRAGMA journal_mode").fetchone()[0].upper() == "WAL"
+    finally:
+        first.close()
+        second.close()
+
+
+def test_writer_commits_and_rolls_back(tmp_path: Path):
+    """The shared writer commits clean blocks and discards failed ones."""
+    test_db = Database(db_path=tmp_path / "test.db")
+    with test_db.get_writer() as conn:
+        conn.execute("CREATE TABLE items (name TEXT NOT NULL)")
+        conn.execute("INSERT INTO items (name) VALUES ('kept')")
+
+    with pytest.raises(RuntimeError):
+        with test_db.get_writer() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('discarded')")
+            raise RuntimeError("boom")
+
+    with test_db.get_reader() as conn:
+        names = [row["name"] for row in conn.execute("SELECT name FROM items")]
+    test_db.close()
+
+    assert names == ["kept"]
+
+
+def test_reader_pool_is_read_only_and_reused(tmp_path: Path):
+    """Pooled readers reject writes and are handed back out after release."""
+    test_db = Database(db_path=tmp_path / "test.db", read_pool_size=1)
+    with test_db.get_writer() as conn:
+        conn.execute("CREATE TABLE items (name TEXT NOT NULL)")
+
+    with test_db.get_reader() as first:
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("INSERT INTO items (name) VALUES ('nope')")
+
+    with test_db.get_reader() as second:
+        assert second is first
+        assert second.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    test_db.close()
+
+
+def test_migrations_apply_once_in_order(tmp_path: Path):
+    """Fresh databases record every migration; a second run is a no-op."""
+    test_db = Database(db_path=tmp_path / "test.db")
+    test_db.run_migrations()
+    test_db.run_migrations()
+
+    expected = sorted(p.name for p in (Path(__file__).parent / "migrations").glob("*.sql"))
+    with test_db.get_reader() as conn:
+        applied = [row["name"] for row in conn.execute("SELECT name FROM _migrations ORDER BY id")]
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master")}
+        upsert_plan = " ".join(
+            row["detail"]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM incidents WHERE external_id = ? AND source = ?",
+                ("OPS-1", "jira"),
+            )
+        )
+    test_db.close()
+
+    assert applied == expected
+    assert {"incidents", "sessions", "idempotency_keys"} <= tables
+    assert "cluster_runs_new" not in tables
+    assert "idx_incidents_src_sev_occurred" in tables
+    assert not {"idx_incidents_external_id", "idx_incidents_source"} & tables
+    assert "sqlite_autoindex_incidents_1" in upsert_plan
+
+
+def test_split_sql_statements_respects_literals_and_triggers():
+    """Semicolons inside literals, comments and trigger bodies do not split statements."""
+    script = (
+        "CREATE TABLE a (x TEXT DEFAULT 'a;b'); -- note; here\n"
+        "CREATE TRIGGER t AFTER INSERT ON a BEGIN SELECT 1; SELECT 2; END;\n"
+        "-- trailing comment\n"
+    )
+
+    statements = _split_sql_statements(script)
+
+    assert len(statements) == 2
+    assert statements[0] == "CREATE TABLE a (x TEXT DEFAULT 'a;b');"
+    assert statements[1].endswith("SELECT 2; END;")
+
+
+def test_split_sql_statements_keeps_or_rejects_unterminated_tail():
+    """A last statement without ';' is kept; an unfinished one raises instead of vanishing."""
+    assert _split_sql_statements("CREATE TABLE a (x);\nCREATE INDEX i ON a (x) -- done\n") == [
+        "CREATE TABLE a (x);",
+        "CREATE INDEX i ON a (x) -- done",
+    ]
+    assert _split_sql_statements("SELECT 1;\n/* trailing */\n") == ["SELECT 1;"]
+
+    with pytest.raises(ValueError):
+        _split_sql_statements("CREATE TRIGGER t AFTER INSERT ON a BEGIN SELECT 1;\n")
+
+
+def test_settings_are_cached_and_reloadable(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """get_settings returns one instance until its cache is cleared."""
+    assert get_settings() is get_settings()
+
+    monkeypatch.setenv("WORKBENCH_DB_PATH", str(tmp_path / "override.db"))
+    get_settings.cache_clear()
+    try:
+        assert get_settings().db_path == tmp_path / "override.db"
+    finally:
+        monkeypatch.delenv("WORKBENCH_DB_PATH")
+        get_settings.cache_clear()
+
+
+def test_http_client_limits_follow_current_settings(monkeypatch: pytest.MonkeyPatch):
+    """Connection limits are read when a client is built, not frozen at import."""
+    built: dict = {}
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: built.update(kwargs))
+    monkeypatch.setenv("WORKBENCH_HTTP_MAX_CONNECTIONS", "7")
+    get_settings.cache_clear()
+    try:
+        new_async_client()
+    finally:
+        monkeypatch.delenv("WORKBENCH_HTTP_MAX_CONNECTIONS")
+        get_settings.cache_clear()
+
+    assert built["limits"].max_connections == 7
+
+
+def test_production_serves_precomputed_openapi(tmp_path: Path):
+    """With APP_ENV=production, /openapi.json returns bytes encoded once at import."""
+    script = (
+        "import orjson\n"
+        "from fastapi.testclient import TestClient\n"
+        "from main import app\n"
+        "route = next(r for r in app.router.routes if getattr(r, 'path', None) == app.openapi_url)\n"
+        "assert route.endpoint.__name__ == 'openapi_json', route.endpoint\n"
+        "response = TestClient(app).get(app.openapi_url)\n"
+        "assert response.status_code == 200\n"
+        "assert response.content == orjson.dumps(app.openapi())\n"
+    )
+    env = {
+        **os.environ,
+        "WORKBENCH_APP_ENV": "production",
+        "WORKBENCH_DB_PATH": str(tmp_path / "production.db"),
+    }
+    result = subprocess.run(  # noqa: S603 - fixed script run with this interpreter
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
 def test_health_endpoint_returns_status():
     """Health endpoint should return database and ollama status."""
     client = TestClient(app)
@@ -139,6 +340,100 @@ def test_problem_details_shape_for_404():
     assert "title" in payload
     assert payload["status"] == 404
     assert "detail" in payload
+    assert payload["instance"] == "/incidents/99999"
+    versioned = client.get("/v1/incidents/99999", headers=headers).json()
+    assert versioned["instance"] == "/v1/incidents/99999"
+
+
+def test_problem_document_omits_unset_fields():
+    """Problem documents drop None members and keep extras."""
+    payload = problem_document(
+        status=409,
+        title="Conflict",
+        request_id="req-1",
+        extras={"error_type": "Conflict"},
+    )
+
+    assert payload == {
+        "type": "about:blank",
+        "title": "Conflict",
+        "status": 409,
+        "request_id": "req-1",
+        "error_type": "Conflict",
+    }
+
+
+def test_workbench_error_status_mapping():
+    """Domain errors map to HTTP status by class, including subclasses."""
+    assert _status_for_workbench_error(JiraQueryError("bad jql")) == 422
+    assert _status_for_workbench_error(SlackRateLimitError("slow down")) == 502
+    assert _status_for_workbench_error(ClusteringError("failed")) == 500
+
+    mapped = dict(main_module._STATUS_MAP)
+    _status_for_workbench_error(SlackRateLimitError("again"))
+    assert main_module._STATUS_MAP == mapped
+
+
+def test_json_log_lines_carry_correlation_ids():
+    """Structured log lines include the request ID active when the record was logged."""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(CorrelationFilter())
+    handler.setFormatter(JsonLogFormatter())
+    logger = logging.getLogger("test_phase5.correlation")
+    logger.addHandler(handler)
+    logger.propagate = False
+    set_request_id("req-log-1")
+    try:
+        logger.warning("hello %s", "world")
+    finally:
+        set_request_id(None)
+        logger.removeHandler(handler)
+
+    line = json.loads(stream.getvalue())
+    assert line["message"] == "hello world"
+    assert line["request_id"] == "req-log-1"
+    assert line["trace_id"] is None
+    assert line["ts"].endswith("+00:00")
+
+
+def test_incidents_built_in_one_request_share_created_at():
+    """Default created_at comes from the request clock when one is set."""
+
+    def incident(external_id: str) -> Incident:
+        return Incident(
+            external_id=external_id,
+            source=IncidentSource.JIRA,
+            severity=Severity.SEV2,
+            title="Database failover",
+            occurred_at=datetime(2024, 1, 1, tzinfo=UTC),
+        )
+
+    request_start = datetime(2024, 6, 1, 12, 0, tzinfo=UTC)
+    set_request_now(request_start)
+    try:
+        first = incident("OPS-1")
+        second = incident("OPS-2")
+    finally:
+        set_request_now(None)
+
+    assert first.created_at is request_start
+    assert second.created_at is request_start
+    assert incident("OPS-3").created_at.tzinfo is UTC
+
+
+def test_trace_id_is_parsed_from_traceparent():
+    """Only well-formed traceparent headers yield a trace ID on problem responses."""
+    client = TestClient(app)
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    valid = client.get(
+        "/incidents/1", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+    )
+    malformed = client.get("/incidents/1", headers={"traceparent": "00-xyz-abc-01"})
+
+    assert valid.json()["trace_id"] == trace_id
+    assert "trace_id" not in malformed.json()
 
 
 def test_request_id_is_propagated():
@@ -150,6 +445,107 @@ def test_request_id_is_propagated():
     assert "X-Request-ID" in response.headers
     assert len(response.headers["X-Request-ID"]) > 0
 
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    echoed = client.get(
+        "/health/live",
+        headers={"X-Request-ID": "req-echo-1", "traceparent": traceparent, "tracestate": "a=1"},
+    )
+    assert echoed.headers["X-Request-ID"] == "req-echo-1"
+    assert echoed.headers["traceparent"] == traceparent
+    assert echoed.headers["tracestate"] == "a=1"
+    assert "tracestate" not in response.headers
+
+
+def test_problem_details_carry_request_id():
+    """Error bodies echo the correlation ID set by the request-context middleware."""
+    client = TestClient(app)
+
+    response = client.get("/incidents/99999", headers={"X-Request-ID": "req-problem-1"})
+
+    assert response.status_code == 401
+    assert response.json()["request_id"] == "req-problem-1"
+
+
+def test_legacy_path_rewrite_keeps_client_path_and_tolerates_missing_raw_path():
+    """The rewritten scope remembers the sent path and handles raw_path=None."""
+    seen: dict = {}
+
+    async def inner(scope, receive, send):
+        seen.update(scope)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    middleware = LegacyPathMiddleware(inner, prefixes=("/incidents",))
+    scope = {"type": "http", "path": "/incidents/7", "raw_path": None}
+    asyncio.run(middleware(scope, receive, send))
+
+    assert seen["path"] == "/v1/incidents/7"
+    assert seen["raw_path"] == b"/v1/incidents/7"
+    assert client_path(seen) == "/incidents/7"
+
+
+def test_legacy_paths_are_served_from_versioned_routes():
+    """Unversioned router prefixes resolve to the same handlers as /v1."""
+    client = TestClient(app)
+
+    assert client.get("/health/live").json() == {"status": "ok"}
+    assert client.get("/v1/health/live").json() == {"status": "ok"}
+    assert client.get("/healthz").status_code == 404
+
+
+def test_cors_preflight_allows_only_known_headers():
+    """Preflight accepts the headers the frontend sends and rejects others."""
+    client = TestClient(app)
+    preflight = {
+        "Origin": "http://localhost:1420",
+        "Access-Control-Request-Method": "DELETE",
+    }
+
+    allowed = client.options(
+        "/incidents",
+        headers={**preflight, "Access-Control-Request-Headers": "content-type,x-csrf-token"},
+    )
+    rejected = client.options(
+        "/incidents", headers={**preflight, "Access-Control-Request-Headers": "x-unknown"}
+    )
+
+    assert allowed.status_code == 200
+    assert rejected.status_code == 400
+
+
+def test_csrf_rejects_session_write_without_token():
+    """A cookie-authenticated write without the CSRF header is refused."""
+    client = TestClient(app)
+    login_admin(client)
+
+    response = client.post("/auth/logout")
+
+    assert response.status_code == 403
+    assert response.json()["type"].endswith("/csrf-token")
+    assert client.get("/auth/me").status_code == 200
+
+
+def test_shared_http_client_does_not_carry_upstream_cookies():
+    """A session cookie set for one caller's credentials is never sent on the next call."""
+    seen: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("cookie"))
+        return httpx.Response(200, headers={"Set-Cookie": "JSESSIONID=userA; Path=/"})
+
+    async def scenario() -> None:
+        async with new_async_client(transport=httpx.MockTransport(handler)) as client:
+            await client.get("https://jira.example/rest/api/2/myself", auth=("a", "x"))
+            await client.get("https://jira.example/rest/api/2/myself", auth=("b", "y"))
+            assert not client.cookies
+
+    asyncio.run(scenario())
+    assert seen == [None, None]
+
 
 def test_logout_revokes_session_immediately():
     """Session logout should revoke access immediately."""
@@ -166,6 +562,181 @@ def test_logout_revokes_session_immediately():
     assert me_after.status_code == 401
 
 
+def test_logout_invalidates_cached_session_token():
+    """A revoked token must not be served from the session cache."""
+    client = TestClient(app)
+    headers = login_admin(client)
+    session_cookies = {
+        name: client.cookies.get(name)
+        for name in session_cookie_name_candidates()
+        if client.cookies.get(name)
+    }
+
+    assert client.get("/auth/me").status_code == 200
+    assert client.get("/auth/me").status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+
+    replay = TestClient(app)
+    replay.cookies.update(session_cookies)
+    assert replay.get("/auth/me").status_code == 401
+
+
+def test_last_seen_updates_are_batched_until_flush():
+    """Recorded activity is written in one batch, keeping the latest time per session."""
+    client = TestClient(app)
+    login_admin(client)
+    with db.get_reader() as conn:
+        token_hash = conn.execute(
+            "SELECT token_hash FROM sessions ORDER BY id DESC LIMIT 1"
+        ).fetchone()[0]
+
+    def last_seen() -> str | None:
+        with db.get_reader() as conn:
+            return conn.execute(
+                "SELECT last_seen_at FROM sessions WHERE token_hash = ?", (token_hash,)
+            ).fetchone()[0]
+
+    async def scenario() -> str | None:
+        flusher = LastSeenFlusher(interval_seconds=3600)
+        flusher.start()
+        flusher.record(token_hash, "2030-01-01T00:00:00+00:00")
+        flusher.record(token_hash, "2030-01-01T00:00:05+00:00")
+        pending = last_seen()
+        await flusher.stop()
+        return pending
+
+    assert asyncio.run(scenario()) != "2030-01-01T00:00:05+00:00"
+    assert last_seen() == "2030-01-01T00:00:05+00:00"
+
+
+def test_webhook_deliveries_are_queued_once():
+    """A repeated delivery ID is acknowledged as a duplicate and not queued again."""
+    client = TestClient(app)
+    body = json.dumps({"action": "opened", "number": 7}).encode("utf-8")
+    signature = hmac.new(
+        get_settings().webhook_secret.encode("utf-8"), body, hashlib.sha256
+    ).hexdigest()
+    headers = {
+        "Content-Type": "application/json",
+        "X-Webhook-Delivery": f"delivery-{uuid4().hex}",
+        "X-Webhook-Signature": f"sha256={signature}",
+    }
+
+    forged = client.post(
+        "/webhooks/github",
+        content=body,
+        headers={**headers, "X-Webhook-Signature": "sha256=" + "0" * 64},
+    )
+    assert forged.status_code == 401
+
+    first = client.post("/webhooks/github", content=body, headers=headers)
+    # Served from the in-process seen-delivery cache...
+    second = client.post("/webhooks/github", content=body, headers=headers)
+    # ...and, once that is cold, from the receipts table's unique key.
+    webhooks_router._seen_deliveries.clear()
+    third = client.post("/webhooks/github", content=body, headers=headers)
+
+    assert first.status_code == 200
+    assert first.json()["status"] == "accepted"
+    duplicate = {
+        "status": "duplicate",
+        "provider": "github",
+        "delivery_id": headers["X-Webhook-Delivery"],
+        "queued": False,
+    }
+    assert second.json() == duplicate
+    assert third.json() == duplicate
+    with db.get_reader() as conn:
+        (jobs,) = conn.execute(
+            "SELECT COUNT(*) FROM webhook_jobs WHERE delivery_id = ?",
+            (headers["X-Webhook-Delivery"],),
+        ).fetchone()
+    assert jobs == 1
+
+
+def test_scrypt_derivations_are_bounded(monkeypatch):
+    """Concurrent password hashing never runs more derivations than the slot count."""
+    import threading
+    import time
+
+    from security import auth as auth_module
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_scrypt(*args, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return b"\0" * 32
+
+    slots = threading.BoundedSemaphore(2)
+    monkeypatch.setattr(auth_module, "_scrypt_slots", lambda concurrency: slots)
+    monkeypatch.setattr(auth_module.hashlib, "scrypt", slow_scrypt)
+    workers = [threading.Thread(target=auth_module.hash_password, args=("pw",)) for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert peak == 2
+
+
+def test_legacy_pbkdf2_hash_is_upgraded_on_login():
+    """PBKDF2 hashes still verify and are replaced with scrypt after a successful login."""
+    username = f"legacy-{uuid4().hex}"
+    legacy_hash = _encode_password_hash(password="old-secret", salt=b"0" * 16, iterations=1_000)
+    with db.get_writer() as conn:
+        conn.execute(
+            "INSERT INTO users (username, password_hash, roles) VALUES (?, ?, ?)",
+            (username, legacy_hash, json.dumps(["viewer"])),
+        )
+
+    try:
+        assert authenticate_credentials(username, "wrong") is None
+        user = authenticate_credentials(username, "old-secret")
+        assert user is not None and user.roles == {"viewer"}
+
+        with db.get_reader() as conn:
+            (stored,) = conn.execute(
+                "SELECT password_hash FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        assert stored.startswith("scrypt$")
+        assert not password_needs_rehash(stored)
+        assert verify_password("old-secret", stored)
+        assert not verify_password("wrong", stored)
+    finally:
+        with db.get_writer() as conn:
+            conn.execute("DELETE FROM users WHERE username = ?", (username,))
+
+
+def test_role_dependencies_are_shared_per_role_set():
+    """Routers guarding with the same roles get one dependency callable."""
+    admin = require_roles_dependency({"admin"})
+    assert require_roles_dependency({"admin"}) is admin
+    assert require_roles_dependency({"admin", "viewer"}) is not admin
+
+
+def test_trusted_origins_are_cached_until_reload(monkeypatch):
+    """Origin settings are read once and picked up again after a reload."""
+    reload_security_settings()
+    default = trusted_origins()
+    monkeypatch.setenv("WORKBENCH_TRUSTED_ORIGINS", "https://ops.example, ")
+    try:
+        assert trusted_origins() is default
+        reload_security_settings()
+        assert trusted_origins() == {"https://ops.example"}
+    finally:
+        monkeypatch.delenv("WORKBENCH_TRUSTED_ORIGINS")
+        reload_security_settings()
+
+
 def test_idempotency_replays_write_response():
     """A repeated idempotency key should replay the original response."""
     client = TestClient(app)
@@ -181,6 +752,23 @@ def test_idempotency_replays_write_response():
     assert second.headers.get("Idempotency-Replayed") == "true"
 
 
+def test_idempotency_replay_of_completed_key_skips_database(monkeypatch):
+    """Completed records are replayed from the in-process cache."""
+    client = TestClient(app)
+    headers = {**login_admin(client), "Idempotency-Key": f"idem-{uuid4().hex}"}
+    first = client.delete("/incidents", headers=headers)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("replay should not reach the database")
+
+    monkeypatch.setattr(idempotency.IdempotencyMiddleware, "_reserve_or_fetch", fail)
+    second = client.delete("/incidents", headers=headers)
+
+    assert second.status_code == first.status_code
+    assert second.json() == first.json()
+    assert second.headers.get("Idempotency-Replayed") == "true"
+
+
 def test_idempotency_blocks_duplicate_while_first_request_pending():
     """A second request with a pending key should be rejected, not executed twice."""
     client = TestClient(app)
@@ -210,6 +798,73 @@ def test_idempotency_blocks_duplicate_while_first_request_pending():
     assert payload["type"].endswith("/idempotency-in-progress")
 
 
+def test_idempotency_key_reused_with_different_payload_is_rejected():
+    """A key reserved for one payload cannot be replayed for another."""
+    client = TestClient(app)
+    headers = {**login_admin(client), "Idempotency-Key": f"idem-{uuid4().hex}"}
+
+    first = client.request("DELETE", "/incidents", headers=headers, content=b"first")
+    second = client.request("DELETE", "/incidents", headers=headers, content=b"second")
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+    assert second.json()["type"].endswith("/idempotency-conflict")
+
+
+def test_idempotency_streams_oversized_body_without_storing(monkeypatch):
+    """A body past the storage limit is forwarded whole and the key stays pending."""
+    from starlette.applications import Starlette
+    from starlette.responses import StreamingResponse
+    from starlette.routing import Route
+
+    monkeypatch.setattr(idempotency, "MAX_STORED_RESPONSE_BYTES", 4)
+
+    async def chunks():
+        for chunk in (b'{"a"', b': 1, "b"', b": 2}"):
+            yield chunk
+
+    async def endpoint(request):
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    client = TestClient(
+        idempotency.IdempotencyMiddleware(
+            Starlette(routes=[Route("/echo", endpoint, methods=["POST"])])
+        )
+    )
+    headers = {"Idempotency-Key": f"idem-{uuid4().hex}"}
+
+    first = client.post("/echo", headers=headers)
+    second = client.post("/echo", headers=headers)
+
+    assert first.content == b'{"a": 1, "b": 2}'
+    assert second.status_code == 409
+    assert second.json()["type"].endswith("/idempotency-in-progress")
+
+
+def test_idempotency_hashes_chunked_body_like_whole_body():
+    """A body sent in chunks reaches the app intact and matches the same bytes sent at once."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def endpoint(request):
+        return JSONResponse({"body": (await request.body()).decode()})
+
+    client = TestClient(
+        idempotency.IdempotencyMiddleware(
+            Starlette(routes=[Route("/echo", endpoint, methods=["POST"])])
+        )
+    )
+    headers = {"Idempotency-Key": f"idem-{uuid4().hex}"}
+
+    first = client.post("/echo", headers=headers, content=iter([b"ab", b"cd"]))
+    second = client.post("/echo", headers=headers, content=b"abcd")
+
+    assert first.json() == {"body": "abcd"}
+    assert second.json() == {"body": "abcd"}
+    assert second.headers.get("Idempotency-Replayed") == "true"
+
+
 def test_empty_incidents_list():
     """Test that empty incidents list is handled gracefully."""
     client = TestClient(app)
@@ -227,6 +882,144 @@ def test_empty_incidents_list():
     assert data["total"] == 0
 
 
+def test_incident_list_and_detail_round_trip_rows():
+    """Stored rows come back with parsed enums, timestamps and raw_data."""
+    client = TestClient(app)
+    headers = login_admin(client)
+    client.delete("/incidents", headers=headers)
+
+    with db.get_writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO incidents (external_id, source, severity, title, description,
+                                   occurred_at, resolved_at, raw_data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                ("RT-1", "jira", "SEV1", "Outage", None, "2024-01-02T10:00:00", None, '{"k": 1}'),
+                (
+                    "RT-2",
+                    "slack",
+                    "SEV3",
+                    "Blip",
+                    "minor",
+                    "2024-01-01T09:00:00",
+                    "2024-01-01T10:30:00",
+                    "{}",
+                ),
+            ],
+        )
+
+    listed = client.get("/incidents", headers=headers).json()
+    assert listed["total"] == 2
+    assert [item["external_id"] for item in listed["incidents"]] == ["RT-1", "RT-2"]
+    first, second = listed["incidents"]
+    assert first["description"] == ""
+    assert first["raw_data"] == {"k": 1}
+    assert first["resolved_at"] is None
+    assert second["resolved_at"].startswith("2024-01-01T10:30:00")
+
+    filtered = client.get("/incidents", params={"severity": "SEV3"}, headers=headers).json()
+    assert filtered["total"] == 1
+    assert filtered["incidents"][0]["source"] == "slack"
+
+    first_page = client.get(
+        "/incidents", params={"limit": 1, "include_total": True}, headers=headers
+    ).json()
+    assert [item["external_id"] for item in first_page["incidents"]] == ["RT-1"]
+    assert first_page["total"] == 2
+
+    uncounted = client.get("/incidents", params={"limit": 1, "offset": 1}, headers=headers).json()
+    assert [item["external_id"] for item in uncounted["incidents"]] == ["RT-2"]
+    assert uncounted["total"] == 2
+
+    past_end = client.get(
+        "/incidents", params={"offset": 10, "include_total": True}, headers=headers
+    ).json()
+    assert past_end["incidents"] == []
+    assert past_end["total"] == 2
+
+    uncounted_past_end = client.get("/incidents", params={"offset": 10}, headers=headers).json()
+    assert uncounted_past_end["incidents"] == []
+    assert uncounted_past_end["total"] == 10
+
+    detail = client.get(f"/incidents/{first['id']}", headers=headers).json()
+    assert detail["incident"] == first
+
+    client.delete("/incidents", headers=headers)
+
+
+def test_incident_list_and_detail_serialize_timestamps_identically():
+    """The list fast path renders timestamps exactly like the pydantic detail response."""
+    client = TestClient(app)
+    headers = login_admin(client)
+    client.delete("/incidents", headers=headers)
+
+    with db.get_writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO incidents (external_id, source, severity, title, description,
+                                   occurred_at, resolved_at, raw_data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    "TS-1",
+                    "jira",
+                    "SEV1",
+                    "UTC",
+                    "",
+                    "2024-01-02T10:00:00+00:00",
+                    "2024-01-02T11:00:00.120000+00:00",
+                    "{}",
+                ),
+                ("TS-2", "slack", "SEV2", "Offset", "", "2024-01-01T09:00:00.5+05:30", None, "{}"),
+            ],
+        )
+
+    listed = client.get("/incidents", headers=headers).json()["incidents"]
+    assert listed[0]["occurred_at"] == "2024-01-02T10:00:00Z"
+    for item in listed:
+        detail = client.get(f"/incidents/{item['id']}", headers=headers).json()
+        assert detail["incident"] == item
+
+    client.delete("/incidents", headers=headers)
+
+
+def test_delete_all_incidents_clears_dependents_and_restores_foreign_keys():
+    """Bulk delete removes cascaded rows and leaves the writer enforcing foreign keys."""
+    client = TestClient(app)
+    headers = login_admin(client)
+    client.delete("/incidents", headers=headers)
+
+    with db.get_writer() as conn:
+        incident_id = conn.execute(
+            """
+            INSERT INTO incidents (external_id, source, severity, title, occurred_at, raw_data)
+            VALUES ('DEL-1', 'jira', 'SEV2', 'Queue backlog', '2024-01-01T00:00:00', '{}')
+            """
+        ).lastrowid
+        conn.execute(
+            "INSERT INTO embeddings (incident_id, embedding, model) VALUES (?, ?, 'test')",
+            (incident_id, b"\x00" * 4),
+        )
+
+    response = client.delete("/incidents", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 1
+    with db.get_writer() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 0
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO embeddings (incident_id, embedding, model) VALUES (?, ?, 'test')",
+                (incident_id, b"\x00" * 4),
+            )
+
+    assert client.delete("/incidents", headers=headers).json()["deleted"] == 0
+
+
 def test_metrics_with_no_data():
     """Test metrics endpoint with no incidents."""
     client = TestClient(app)
@@ -257,6 +1050,46 @@ def test_reports_list_empty():
     assert isinstance(data, list)
 
 
+def test_reports_list_fills_metrics_fields_missing_from_stored_json():
+    """Reports stored before newer metrics fields existed still list every field."""
+    client = TestClient(app)
+    run_id = str(uuid4())
+    report_id = str(uuid4())
+    legacy_metrics = {
+        "total_incidents": 3,
+        "sev1_count": 1,
+        "sev2_count": 1,
+        "sev3_count": 1,
+        "sev4_count": 0,
+        "unknown_count": 0,
+    }
+
+    with db.get_writer() as conn:
+        conn.execute(
+            "INSERT INTO cluster_runs (id, n_clusters, method, parameters) VALUES (?, 1, 'x', '{}')",
+            (run_id,),
+        )
+        conn.execute(
+            """
+            INSERT INTO reports (id, cluster_run_id, title, executive_summary,
+                                 metrics_json, created_at, docx_path)
+            VALUES (?, ?, 'Legacy', 'Summary', ?, '2024-01-01T00:00:00+00:00', NULL)
+            """,
+            (report_id, run_id, json.dumps(legacy_metrics)),
+        )
+
+    try:
+        response = client.get("/reports")
+        assert response.status_code == 200
+        report = next(r for r in response.json() if r["report_id"] == report_id)
+        assert report["metrics"] == MetricsResult.model_validate(legacy_metrics).model_dump()
+        assert report["docx_path"] is None
+    finally:
+        with db.get_writer() as conn:
+            conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+            conn.execute("DELETE FROM cluster_runs WHERE id = ?", (run_id,))
+
+
 def test_cluster_runs_empty():
     """Test cluster runs endpoint when no runs exist."""
     client = TestClient(app)
@@ -268,5 +1101,40 @@ def test_cluster_runs_empty():
     assert isinstance(data, list)
 
 
+def test_cluster_run_round_trips_from_stored_rows(tmp_path: Path):
+    """Stored cluster runs come back with parsed timestamps and serialize cleanly."""
+    test_db = Database(db_path=tmp_path / "test.db")
+    test_db.run_migrations()
+    conn = test_db.get_connection()
+    try:
+        conn.execute(
+            "INSERT INTO cluster_runs (id, n_clusters, method, parameters) VALUES (?, ?, ?, ?)",
+            ("run-1", 1, "agglomerative", json.dumps({"linkage": "average"})),
+        )
+        conn.execute(
+            "INSERT INTO clusters (run_id, cluster_label, summary, centroid_text) "
+            "VALUES ('run-1', 0, 'Disk full', NULL)"
+        )
+        conn.commit()
+
+        result = IncidentClusterer(conn).get_run("run-1")
+    finally:
+        conn.close()
+
+    assert result is not None
+    assert isinstance(result.created_at, datetime)
+    payload = json.loads(result.model_dump_json())
+    assert payload["parameters"] == {"linkage": "average"}
+    assert payload["clusters"] == [
+        {
+            "cluster_id": 0,
+            "incident_ids": [],
+            "size": 0,
+            "summary": "Disk full",
+            "centroid_text": None,
+        }
+    ]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -77,6 +77,8 @@ export function useIncidents(filters?: {
       if (filters?.severity) params.append("severity", filters.severity);
       if (filters?.offset !== undefined) params.append("offset", filters.offset.toString());
       if (filters?.limit !== undefined) params.append("limit", filters.limit.toString());
+      // The page header shows the full count, so ask the API to compute it.
+      params.append("include_total", "true");
 
       const response = await client.get<IncidentListResponse>(
         `/incidents?${params.toString()}`